@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+from openpyxl import Workbook, load_workbook
+
+from contract_bot.contracts.cache import ParseCache
+from contract_bot.contracts.parser import (
+    HEADER_ROW_INDEX,
+    PARSER_VERSION,
+    READER_BACKENDS,
+    iter_contracts,
+    parse_contracts,
+)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_OUTPUT = Path("benchmarks") / f"parser-{PARSER_VERSION}.json"
+REGRESSION_THRESHOLD = 1.2
+PARSER_NAMES = ("rowwise", "columnar", "streaming", "calamine", "auto", "cache_disk_hit", "csv")
+
+# порядок и названия колонок листа «Контроль» из калькулятора
+HEADERS = (
+    "Наименование организации",
+    "Фамилия, имя, отчество",
+    "Должность служащего, профессия рабочего",
+    "Дата контракта",
+    "Номер контракта",
+    "Дата начала контракта",
+    "Срок действия контракта",
+    None,
+    None,
+    "Дата окончания контракта",
+    "Срок для предупреж-дения за 1 месяц до окончания контракта",
+    "Уведомление",
+    "Отметка о готовности",
+    "Срок, на который продлен контракт или заключен новый контракт",
+    None,
+    None,
+    None,
+    "Дата начала продленного контракта",
+    "Дата окончания продленного контракта",
+)
+ORGANIZATIONS = (
+    "ООО «Ромашка»",
+    "ОАО «Минский завод»",
+    "Индивидуальный предприниматель Микель Евгений Иванович",
+)
+POSITIONS = ("Администратор", "Бухгалтер", "Инженер", "Кладовщик", None)
+LABELS = ("Срок предупреждения пропущен", "Предупредить", "#VALUE!", None)
+MARKS = ("П", "Н", "Д", "И", None)
+
+
+def generate_workbook(path: Path, rows: int, seed: int = 7) -> Path:
+    rnd = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Контроль")
+    for index in range(HEADER_ROW_INDEX):
+        if index == 4:
+            sheet.append([None] * 5 + ["Горизонт", "1 мес."])
+        else:
+            sheet.append([])
+    sheet.append(list(HEADERS))
+
+    start = date(2024, 1, 1)
+    for index in range(rows):
+        contract_date = start + timedelta(days=rnd.randint(0, 730))
+        end_date = contract_date + timedelta(days=365 * rnd.randint(1, 3))
+        reminder = end_date - timedelta(days=30)
+        # вручную заполненные таблицы смешивают даты, строки и ошибки формул
+        end_cell = rnd.choices(
+            (end_date, end_date.strftime("%d.%m.%Y"), end_date.isoformat(), "#VALUE!"),
+            weights=(70, 20, 5, 5),
+        )[0]
+        sheet.append([
+            rnd.choice(ORGANIZATIONS),
+            f"Сотрудник {index:06d}" if rnd.random() > 0.02 else None,
+            rnd.choice(POSITIONS),
+            datetime.combine(contract_date, datetime.min.time()),
+            rnd.choice((index + 1, float(index + 1), f"{index + 1}-К")),
+            contract_date.strftime("%d.%m.%Y") if rnd.random() < 0.3 else contract_date,
+            f"{rnd.randint(1, 3)} год",
+            None,
+            None,
+            end_cell,
+            reminder if rnd.random() > 0.1 else "#VALUE!",
+            rnd.choice(LABELS),
+            rnd.choice(MARKS),
+            rnd.choice((1, 2, "1 год", None)),
+            None,
+            None,
+            None,
+            end_date + timedelta(days=1) if rnd.random() > 0.5 else None,
+            end_date + timedelta(days=366) if rnd.random() > 0.5 else None,
+        ])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(path)
+    return path
+
+
+def export_csv(path: Path) -> Path:
+    # так выглядит выгрузка Google Sheets в CSV: даты в виде текста дд.мм.гггг
+    target = path.with_suffix(".csv")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        with target.open("w", encoding="utf-8", newline="") as stream:
+            writer = csv.writer(stream)
+            for row in workbook["Контроль"].iter_rows(values_only=True):
+                writer.writerow([
+                    value.strftime("%d.%m.%Y") if isinstance(value, datetime)
+                    else "" if value is None else value
+                    for value in row
+                ])
+    finally:
+        workbook.close()
+    return target
+
+
+def _parsers(cache_dir: Path) -> dict[str, Callable[[Path], int]]:
+    def cache_disk_hit(path: Path) -> int:
+        # новый экземпляр кеша на каждый замер: имитирует первый запуск после рестарта
+        return len(ParseCache(cache_dir / path.stem).get_or_parse(path))
+
+    return {
+        "rowwise": lambda path: len(parse_contracts(path, vectorized=False)),
+        "columnar": lambda path: len(parse_contracts(path, backend="pandas")),
+        "streaming": lambda path: sum(1 for _ in iter_contracts(path)),
+        "calamine": lambda path: len(parse_contracts(path, backend="calamine")),
+        "auto": lambda path: len(parse_contracts(path)),
+        "cache_disk_hit": cache_disk_hit,
+        "csv": lambda path: len(parse_contracts(path.with_suffix(".csv"))),
+    }
+
+
+def _warm_cache(cache_dir: Path, path: Path) -> None:
+    ParseCache(cache_dir / path.stem).get_or_parse(path)
+
+
+def measure(parser: Callable[[Path], int], path: Path, repeat: int) -> dict[str, float]:
+    timings = []
+    records = 0
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        records = parser(path)
+        timings.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    parser(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "records": records,
+        "seconds": min(timings),
+        "peak_mb": round(peak / (1 << 20), 2),
+    }
+
+
+def compare(results: list[dict], baseline_path: Path) -> int:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(item["rows"], item["parser"]): item for item in baseline["results"]}
+    regressions = 0
+    for item in results:
+        before = previous.get((item["rows"], item["parser"]))
+        if not before or not before["seconds"]:
+            continue
+        ratio = item["seconds"] / before["seconds"]
+        flag = "РЕГРЕССИЯ" if ratio > REGRESSION_THRESHOLD else "ok"
+        if ratio > REGRESSION_THRESHOLD:
+            regressions += 1
+        print(f"{item['parser']:>22} {item['rows']:>7}: x{ratio:.2f} {flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замер скорости и памяти разбора таблицы контрактов")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--parsers", nargs="+", default=None, choices=PARSER_NAMES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", type=Path, default=None)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="contract-bench-"))
+    parsers = _parsers(workdir / "cache")
+    selected = args.parsers or list(parsers)
+    if "calamine" in selected and not READER_BACKENDS["calamine"].available:
+        print("python-calamine не установлен, замер calamine пропущен")
+        selected.remove("calamine")
+
+    results = []
+    for size in args.sizes:
+        path = workdir / f"control_{size}.xlsx"
+        if not path.exists():
+            generate_workbook(path, size)
+        if "csv" in selected and not path.with_suffix(".csv").exists():
+            export_csv(path)
+        if "cache_disk_hit" in selected:
+            _warm_cache(workdir / "cache", path)
+        for name in selected:
+            stats = measure(parsers[name], path, args.repeat)
+            results.append({"rows": size, "parser": name, **stats})
+            print(f"{name:>22} {size:>7}: {stats['seconds']:.3f} с, пик {stats['peak_mb']} МБ, записей {stats['records']}")
+
+    report = {
+        "parser_version": PARSER_VERSION,
+        "python": platform.python_version(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Результаты сохранены в {args.output}")
+
+    if args.baseline:
+        return 1 if compare(results, args.baseline) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import astuple, fields
+from datetime import date
+from pathlib import Path
+
+from baseline_parser import ContractRecord as BaselineRecord
+from baseline_parser import parse_contracts as parse_baseline
+from contract_bot.contracts.parser import READER_BACKENDS, iter_contracts, parse_contracts
+
+SAMPLES = Path("tech-spec")
+# сравниваются только поля исходной записи: поля, добавленные позже (source), эталону неизвестны
+BASELINE_FIELDS = tuple(field.name for field in fields(BaselineRecord))
+DATE_FIELDS = {field.name for field in fields(BaselineRecord) if "date" in str(field.type)}
+# исходный парсер читал число в столбце даты как наносекунды от 1970 года
+UNIX_EPOCH = date(1970, 1, 1)
+
+
+def check(path: Path) -> bool:
+    expected = [astuple(record) for record in parse_baseline(path)]
+    rowwise = _fields(parse_contracts(path, vectorized=False))
+    ok = _compare(path, "rowwise", expected, rowwise, against="эталон")
+
+    candidates = {
+        name: lambda name=name: parse_contracts(path, backend=name)
+        for name, reader in READER_BACKENDS.items()
+        if reader.available and reader.supports(path)
+    }
+    candidates["streaming"] = lambda: list(iter_contracts(path))
+    # все способы чтения обязаны совпадать с построчным разбором без всяких допущений
+    for name, parse in candidates.items():
+        ok = _compare(path, name, rowwise, _fields(parse()), against="построчно", strict=True) and ok
+    return ok
+
+
+def _compare(
+    path: Path,
+    name: str,
+    expected: list[tuple],
+    records: list[tuple],
+    *,
+    against: str,
+    strict: bool = False,
+) -> bool:
+    if len(records) != len(expected):
+        print(f"FAIL {path} [{name}]: {against} {len(expected)}, {name} {len(records)}")
+        return False
+
+    explained = []
+    for index, (left, right) in enumerate(zip(expected, records)):
+        diff = {key: (a, b) for key, a, b in zip(BASELINE_FIELDS, left, right) if a != b}
+        if not diff:
+            continue
+        if strict or not all(_is_known_change(key, a, b) for key, (a, b) in diff.items()):
+            print(f"FAIL {path} [{name}] строка {index}: {diff}")
+            return False
+        explained.append((index, diff))
+
+    print(f"OK   {path} [{name}] ({len(records)} записей)")
+    for index, diff in explained:
+        print(f"     ожидаемое расхождение с исходным парсером, строка {index}: {diff}")
+    return True
+
+
+def _is_known_change(key: str, old: object, new: object) -> bool:
+    # задокументированные изменения разбора дат: число — дата Excel, а не наносекунды от 1970 года;
+    # неоднозначная строка вроде 01.11.2024 читается день первым, а не месяц первым
+    if key not in DATE_FIELDS or not isinstance(old, date):
+        return False
+    if old == UNIX_EPOCH:
+        return True
+    return isinstance(new, date) and old.day <= 12 and new == date(old.year, old.day, old.month)
+
+
+def _fields(records: list) -> list[tuple]:
+    return [tuple(getattr(record, key) for key in BASELINE_FIELDS) for record in records]
+
+
+def main(paths: list[Path]) -> int:
+    if not paths:
+        paths = sorted(SAMPLES.glob("*.xls*"))
+    results = [check(path) for path in paths]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main([Path(arg) for arg in sys.argv[1:]]))
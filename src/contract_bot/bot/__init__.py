@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from logging import Logger
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
@@ -14,6 +16,7 @@ def build_bot(
     config: AppConfig,
     state_store: StateStore,
     file_repository: FileRepository,
+    logger: Logger,
 ) -> tuple[Bot, Dispatcher, BotDependencies]:
     bot = Bot(
         token=config.bot.token,
@@ -23,6 +26,7 @@ def build_bot(
         config=config,
         state_store=state_store,
         file_repository=file_repository,
+        logger=logger,
     )
     dispatcher = create_dispatcher(deps)
     return bot, dispatcher, deps
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import timezone
+from logging import Logger
 from typing import Optional
 
 from aiogram import Bot, Dispatcher, Router
@@ -23,10 +24,14 @@ class BotDependencies:
     config: AppConfig
     state_store: StateStore
     file_repository: FileRepository
+    logger: Logger
     reminder_service: Optional[ReminderService] = None
     sheet_sync: Optional[SheetSyncService] = None
 
 
+STATUS_UPCOMING_LIMIT = 5
+
+
 class UploadState:
     waiting_for_file = "waiting_for_file"
 
@@ -98,6 +103,16 @@ def create_dispatcher(deps: BotDependencies) -> Dispatcher:
                     days=deps.reminder_service.reminder_days,
                 )
             )
+            try:
+                upcoming = await deps.reminder_service.upcoming()
+            except Exception as exc:  # noqa: BLE001
+                # статус отвечает и без списка, но причина должна остаться в журнале
+                deps.logger.exception("Не удалось получить контракты в горизонте для /status: %s", exc)
+                upcoming = None
+            if upcoming is not None:
+                lines.append(f"Истекает контрактов в горизонте: {len(upcoming)}")
+                for record in upcoming[:STATUS_UPCOMING_LIMIT]:
+                    lines.append(f"• {record.end_date.strftime('%d.%m.%Y')} — {record.employee}")
         await message.answer("\n".join(lines))
 
     @router.message(Command("help"))
@@ -178,4 +193,5 @@ async def _run_reminder(message: Message, deps: BotDependencies, force: bool) ->
         f"Обработано записей: {result.processed}.\n"
         f"Отправлено уведомлений: {result.notified}.\n"
         f"Пропущено: {result.skipped}."
+        + (f"\nОтложено до повтора: {result.deferred}." if result.deferred else "")
     )
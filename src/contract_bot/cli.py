@@ -6,19 +6,25 @@ from pathlib import Path
 from contract_bot.config import AppConfig
 
 
-def _resolve_paths() -> tuple[Path, Path, Path]:
+def _resolve_paths() -> tuple[Path, Path, Path, Path]:
     try:
         config = AppConfig.load()
-        return config.paths.files_dir, config.paths.generated_dir, config.paths.state_file
+        return (
+            config.paths.files_dir,
+            config.paths.generated_dir,
+            config.paths.state_file,
+            config.paths.parse_cache_dir,
+        )
     except RuntimeError:
         base = Path.cwd()
         files_dir = base / "storage" / "contracts"
         generated_dir = base / "generated"
         state_file = base / "storage" / "meta" / "state.json"
+        parse_cache_dir = base / "storage" / "meta" / "parse_cache"
         files_dir.mkdir(parents=True, exist_ok=True)
         generated_dir.mkdir(parents=True, exist_ok=True)
         state_file.parent.mkdir(parents=True, exist_ok=True)
-        return files_dir, generated_dir, state_file
+        return files_dir, generated_dir, state_file, parse_cache_dir
 
 
 def _clear_directory(path: Path) -> int:
@@ -36,10 +42,11 @@ def _clear_directory(path: Path) -> int:
 
 
 def delete_cache() -> None:
-    files_dir, generated_dir, state_file = _resolve_paths()
+    files_dir, generated_dir, state_file, parse_cache_dir = _resolve_paths()
 
     removed_contracts = _clear_directory(files_dir)
     removed_generated = _clear_directory(generated_dir)
+    removed_parsed = _clear_directory(parse_cache_dir)
 
     if state_file.exists():
         state_file.unlink()
@@ -47,11 +54,19 @@ def delete_cache() -> None:
     else:
         removed_state = 0
 
+    # база SQLite (STATE_BACKEND=sqlite) вместе с файлами журнала WAL
+    state_db = state_file.with_name("state.db")
+    removed_db = state_db.exists()
+    for path in (state_db, state_db.with_name("state.db-wal"), state_db.with_name("state.db-shm")):
+        path.unlink(missing_ok=True)
+
     print(
         "Кеш очищен:\n"
         f"- файлов в storage/contracts: {removed_contracts}\n"
         f"- файлов в generated: {removed_generated}\n"
-        f"- state.json удалён: {'да' if removed_state else 'нет'}"
+        f"- файлов в кеше разбора таблиц: {removed_parsed}\n"
+        f"- state.json удалён: {'да' if removed_state else 'нет'}\n"
+        f"- state.db удалён: {'да' if removed_db else 'нет'}"
     )
 
 
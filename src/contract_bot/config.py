@@ -47,12 +47,54 @@ class PathsConfig(BaseModel):
     def state_file(self) -> Path:
         return self.meta_dir / "state.json"
 
+    @property
+    def state_db_file(self) -> Path:
+        return self.meta_dir / "state.db"
+
+    @property
+    def parse_cache_dir(self) -> Path:
+        return self.meta_dir / "parse_cache"
+
+    @property
+    def snapshot_file(self) -> Path:
+        return self.meta_dir / "snapshot.json"
+
+    @property
+    def file_ids_file(self) -> Path:
+        return self.meta_dir / "file_ids.json"
+
+    @property
+    def outbox_dir(self) -> Path:
+        return self.meta_dir / "outbox"
+
 
 class SchedulerConfig(BaseModel):
     reminder_days: int = Field(default=30, alias="REMINDER_DAYS")
     timezone: str = Field(default="Europe/Minsk", alias="TIMEZONE")
 
 
+class StateConfig(BaseModel):
+    backend: str = Field(default="json", alias="STATE_BACKEND")
+    # только для sqlite: JSON-хранилище (storage.StateStore) не умеет записывать пачку отметок
+    # за одну перезапись state.json, и буфер перед ним лишь откладывал бы те же записи
+    flush_seconds: int = Field(default=5, alias="STATE_FLUSH_SECONDS")
+
+
+class CacheConfig(BaseModel):
+    parse_cache_entries: int = Field(default=4, alias="PARSE_CACHE_ENTRIES")
+    archive_documents: bool = Field(default=True, alias="ARCHIVE_DOCUMENTS")
+    generated_max_mb: int = Field(default=512, alias="GENERATED_MAX_MB")
+    generated_max_age_days: int = Field(default=90, alias="GENERATED_MAX_AGE_DAYS")
+    retention_interval_minutes: int = Field(default=60, alias="RETENTION_INTERVAL_MINUTES")
+
+
+class DeliveryConfig(BaseModel):
+    concurrency: int = Field(default=8, alias="SEND_CONCURRENCY")
+    rate_per_second: float = Field(default=30.0, alias="SEND_RATE_PER_SECOND")
+    retry_seconds: int = Field(default=30, alias="OUTBOX_RETRY_SECONDS")
+    max_attempts: int = Field(default=10, alias="OUTBOX_MAX_ATTEMPTS")
+
+
 class LoggingConfig(BaseModel):
     level: str = Field(default="INFO", alias="LOG_LEVEL")
 
@@ -66,6 +108,7 @@ class IntegrationsConfig(BaseModel):
         default="Контроль окончания сроков действия контрактов.xlsx",
         alias="GOOGLE_SHEET_FILENAME",
     )
+    google_sheet_format: str = Field(default="xlsx", alias="GOOGLE_SHEET_FORMAT")
     sheet_sync_interval_minutes: int = Field(default=5, alias="SHEET_SYNC_INTERVAL_MINUTES")
 
 
@@ -73,6 +116,9 @@ class AppConfig(BaseModel):
     bot: BotConfig
     paths: PathsConfig
     scheduler: SchedulerConfig
+    state: StateConfig
+    cache: CacheConfig
+    delivery: DeliveryConfig
     logging: LoggingConfig
     integrations: IntegrationsConfig
 
@@ -97,6 +143,26 @@ class AppConfig(BaseModel):
                 TIMEZONE=getenv("TIMEZONE", "Europe/Minsk"),
             )
 
+            state = StateConfig(
+                STATE_BACKEND=getenv("STATE_BACKEND", "json").strip().lower(),
+                STATE_FLUSH_SECONDS=int(getenv("STATE_FLUSH_SECONDS", "5")),
+            )
+
+            cache = CacheConfig(
+                PARSE_CACHE_ENTRIES=int(getenv("PARSE_CACHE_ENTRIES", "4")),
+                ARCHIVE_DOCUMENTS=getenv("ARCHIVE_DOCUMENTS", "true").strip().lower() in {"1", "true", "yes", "да"},
+                GENERATED_MAX_MB=int(getenv("GENERATED_MAX_MB", "512")),
+                GENERATED_MAX_AGE_DAYS=int(getenv("GENERATED_MAX_AGE_DAYS", "90")),
+                RETENTION_INTERVAL_MINUTES=int(getenv("RETENTION_INTERVAL_MINUTES", "60")),
+            )
+
+            delivery = DeliveryConfig(
+                SEND_CONCURRENCY=int(getenv("SEND_CONCURRENCY", "8")),
+                SEND_RATE_PER_SECOND=float(getenv("SEND_RATE_PER_SECOND", "30")),
+                OUTBOX_RETRY_SECONDS=int(getenv("OUTBOX_RETRY_SECONDS", "30")),
+                OUTBOX_MAX_ATTEMPTS=int(getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+            )
+
             logging = LoggingConfig(
                 LOG_LEVEL=getenv("LOG_LEVEL", "INFO"),
             )
@@ -110,10 +176,20 @@ class AppConfig(BaseModel):
                     "GOOGLE_SHEET_FILENAME",
                     "Контроль окончания сроков действия контрактов.xlsx",
                 ),
+                GOOGLE_SHEET_FORMAT=getenv("GOOGLE_SHEET_FORMAT", "xlsx").strip().lower(),
                 SHEET_SYNC_INTERVAL_MINUTES=int(getenv("SHEET_SYNC_INTERVAL_MINUTES", "5")),
             )
         except (ValidationError, ValueError) as exc:
             raise RuntimeError("Failed to load configuration") from exc
 
         paths.ensure()
-        return cls(bot=bot, paths=paths, scheduler=scheduler, logging=logging, integrations=integrations)
+        return cls(
+            bot=bot,
+            paths=paths,
+            scheduler=scheduler,
+            state=state,
+            cache=cache,
+            delivery=delivery,
+            logging=logging,
+            integrations=integrations,
+        )
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import date, timedelta
+from pathlib import Path
+
+from contract_bot.contracts.parser import DATE_FIELDS, PARSER_VERSION, ContractRecord, iter_contracts
+from contract_bot.contracts.table import ContractRow, ContractTable
+from contract_bot.contracts.workbook import WorkbookSession
+from contract_bot.utils.files import atomic_write_bytes
+
+CACHE_SUFFIX = ".json.gz"
+RECORD_FIELDS = tuple(field.name for field in fields(ContractRecord))
+DATE_FIELD_NAMES = frozenset(DATE_FIELDS)
+
+
+@dataclass
+class ParseCacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"память={self.memory_hits}, диск={self.disk_hits}, "
+            f"промахи={self.misses}, вытеснено={self.evictions}"
+        )
+
+
+class ParseCache:
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_entries: int = 4,
+        max_age: timedelta = timedelta(days=30),
+    ) -> None:
+        self._dir = cache_dir
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_entries = max(max_entries, 1)
+        self._max_age = max_age
+        self._memory: OrderedDict[str, ContractTable] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = ParseCacheStats()
+
+    @staticmethod
+    def key_for(path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(chunk)
+        return f"{PARSER_VERSION}-{digest.hexdigest()}"
+
+    def get_or_parse(
+        self,
+        path: Path,
+        session: WorkbookSession | None = None,
+    ) -> ContractTable:
+        if not path.exists():
+            raise FileNotFoundError(f"Excel file not found: {path}")
+
+        key = self.key_for(path)
+        with self._lock:
+            table = self._memory.get(key)
+            if table is not None:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return table
+
+        table = self._load(key)
+        if table is not None:
+            with self._lock:
+                self.stats.disk_hits += 1
+                self._remember(key, table)
+            return table
+
+        # промах кеша читается потоково: в памяти только колонки таблицы, без полного списка записей
+        table = ContractTable.from_records(iter_contracts(path, session=session))
+        with self._lock:
+            self.stats.misses += 1
+            self._remember(key, table)
+        self._dump(key, table)
+        self.evict()
+        return table
+
+    def evict(self) -> int:
+        now = time.time()
+        entries = sorted(
+            self._dir.glob(f"*{CACHE_SUFFIX}"),
+            key=lambda item: item.stat().st_mtime,
+            reverse=True,
+        )
+        removed = 0
+        for position, entry in enumerate(entries):
+            stale_version = not entry.name.startswith(f"{PARSER_VERSION}-")
+            too_old = now - entry.stat().st_mtime > self._max_age.total_seconds()
+            if stale_version or too_old or position >= self._max_entries:
+                entry.unlink(missing_ok=True)
+                removed += 1
+        with self._lock:
+            self.stats.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        for entry in self._dir.glob(f"*{CACHE_SUFFIX}"):
+            entry.unlink(missing_ok=True)
+
+    def _remember(self, key: str, table: ContractTable) -> None:
+        self._memory[key] = table
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _path_for(self, key: str) -> Path:
+        return self._dir / f"{key}{CACHE_SUFFIX}"
+
+    def _load(self, key: str) -> ContractTable | None:
+        path = self._path_for(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as stream:
+                payload = json.load(stream)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+            return None
+
+        if payload.get("fields") != list(RECORD_FIELDS):
+            return None
+        # обновляем mtime, чтобы вытеснение учитывало последнее использование
+        path.touch()
+        return ContractTable.from_records(_decode_row(row) for row in payload.get("rows", []))
+
+    def _dump(self, key: str, table: ContractTable) -> None:
+        payload = {
+            "fields": list(RECORD_FIELDS),
+            "rows": [_encode_row(row) for row in table],
+        }
+        content = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        atomic_write_bytes(self._path_for(key), gzip.compress(content))
+
+
+def _encode_row(record: ContractRecord | ContractRow) -> list:
+    row = []
+    for name in RECORD_FIELDS:
+        value = getattr(record, name)
+        row.append(value.toordinal() if isinstance(value, date) else value)
+    return row
+
+
+def _decode_row(row: list) -> ContractRecord:
+    values = {
+        name: date.fromordinal(value) if name in DATE_FIELD_NAMES and value is not None else value
+        for name, value in zip(RECORD_FIELDS, row)
+    }
+    return ContractRecord(**values)
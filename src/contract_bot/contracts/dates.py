@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+DAY_FIRST_PATTERN = re.compile(r"(\d{1,2})[./](\d{1,2})[./](\d{4})")
+ISO_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?")
+EXCEL_EPOCH = date(1899, 12, 30)
+# 1 — 01.01.1900, 2958465 — 31.12.9999: всё вне диапазона не похоже на дату Excel
+EXCEL_SERIAL_MIN = 1
+EXCEL_SERIAL_MAX = 2958465
+DEFAULT_MEMO_SIZE = 4096
+
+
+@dataclass
+class DateCoercionStats:
+    native: int = 0
+    memo_hits: int = 0
+    fast_path: int = 0
+    excel_serial: int = 0
+    pandas_fallback: int = 0
+    failed: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"готовые={self.native}, из памяти={self.memo_hits}, быстрый разбор={self.fast_path}, "
+            f"excel={self.excel_serial}, pandas={self.pandas_fallback}, ошибки={self.failed}"
+        )
+
+
+class DateCoercer:
+    def __init__(self, memo_size: int = DEFAULT_MEMO_SIZE) -> None:
+        self._memo: dict[str, date | None] = {}
+        self._memo_size = memo_size
+        self._lock = threading.Lock()
+        self.stats = DateCoercionStats()
+
+    def __call__(self, value: object) -> date | None:
+        if value is None or value is pd.NaT or value is pd.NA:
+            return None
+        if isinstance(value, float) and value != value:
+            return None
+        if isinstance(value, datetime):
+            self.stats.native += 1
+            return value.date()
+        if isinstance(value, date):
+            self.stats.native += 1
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return self._from_serial(value)
+        if isinstance(value, str):
+            return self._from_text(value)
+        return self._fallback(value)
+
+    def reset_stats(self) -> None:
+        self.stats = DateCoercionStats()
+
+    def _from_serial(self, value: int | float) -> date | None:
+        if not EXCEL_SERIAL_MIN <= value <= EXCEL_SERIAL_MAX:
+            self.stats.failed += 1
+            return None
+        self.stats.excel_serial += 1
+        return EXCEL_EPOCH + timedelta(days=int(value))
+
+    def _from_text(self, value: str) -> date | None:
+        text = value.strip()
+        try:
+            parsed = self._memo[text]
+        except KeyError:
+            pass
+        else:
+            self.stats.memo_hits += 1
+            return parsed
+
+        parsed = self._parse_text(text)
+        with self._lock:
+            if len(self._memo) >= self._memo_size:
+                self._memo.clear()
+            self._memo[text] = parsed
+        return parsed
+
+    def _parse_text(self, text: str) -> date | None:
+        if not text:
+            self.stats.failed += 1
+            return None
+
+        match = DAY_FIRST_PATTERN.fullmatch(text)
+        if match:
+            day, month, year = (int(part) for part in match.groups())
+            return self._build(year, month, day)
+
+        match = ISO_PATTERN.fullmatch(text)
+        if match:
+            year, month, day = (int(part) for part in match.groups())
+            return self._build(year, month, day)
+
+        return self._fallback(text)
+
+    def _build(self, year: int, month: int, day: int) -> date | None:
+        try:
+            parsed = date(year, month, day)
+        except ValueError:
+            self.stats.failed += 1
+            return None
+        self.stats.fast_path += 1
+        return parsed
+
+    def _fallback(self, value: object) -> date | None:
+        parsed = pd.to_datetime(value, errors="coerce", dayfirst=True)
+        if pd.isna(parsed):
+            self.stats.failed += 1
+            return None
+        self.stats.pandas_fallback += 1
+        return parsed.date()
+
+
+coerce_date = DateCoercer()
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field, fields
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Mapping
+
+from contract_bot.contracts.parser import ContractRecord
+from contract_bot.utils.files import atomic_write_text
+
+SNAPSHOT_VERSION = 1
+# источник входит в идентификатор строки, а не в отпечаток её содержимого
+FINGERPRINT_FIELDS = tuple(item.name for item in fields(ContractRecord) if item.name != "source")
+
+
+@dataclass
+class SnapshotDiff:
+    added: List[ContractRecord] = field(default_factory=list)
+    changed: List[ContractRecord] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __str__(self) -> str:
+        return f"добавлено={len(self.added)}, изменено={len(self.changed)}, удалено={len(self.removed)}"
+
+
+def contract_identity(record: ContractRecord) -> str:
+    end_date = record.end_date.isoformat() if record.end_date else ""
+    identity = f"{record.employee}|{record.contract_number or ''}|{end_date}"
+    return f"{record.source}|{identity}" if record.source else identity
+
+
+def contract_fingerprint(record: ContractRecord) -> str:
+    digest = hashlib.sha1()
+    for name in FINGERPRINT_FIELDS:
+        value = getattr(record, name)
+        if isinstance(value, date):
+            value = value.isoformat()
+        digest.update(f"{value!s}\x1f".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build_snapshot(records: Iterable[ContractRecord]) -> dict[str, tuple[str, ContractRecord]]:
+    snapshot: dict[str, tuple[str, ContractRecord]] = {}
+    for record in records:
+        identity = contract_identity(record)
+        # одинаковые строки в таблице различаем порядковым номером
+        candidate, counter = identity, 1
+        while candidate in snapshot:
+            counter += 1
+            candidate = f"{identity}#{counter}"
+        snapshot[candidate] = (contract_fingerprint(record), record)
+    return snapshot
+
+
+def diff_snapshots(
+    previous: Mapping[str, str],
+    current: Mapping[str, tuple[str, ContractRecord]],
+) -> SnapshotDiff:
+    diff = SnapshotDiff()
+    for identity, (fingerprint, record) in current.items():
+        known = previous.get(identity)
+        if known is None:
+            diff.added.append(record)
+        elif known != fingerprint:
+            diff.changed.append(record)
+    diff.removed = [identity for identity in previous if identity not in current]
+    return diff
+
+
+class SnapshotStore:
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    def load(self) -> dict[str, str]:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            return {}
+        if payload.get("version") != SNAPSHOT_VERSION:
+            return {}
+        return dict(payload.get("rows", {}))
+
+    def update(self, records: Iterable[ContractRecord]) -> SnapshotDiff:
+        current = build_snapshot(records)
+        diff = diff_snapshots(self.load(), current)
+        if diff.has_changes or not self._path.exists():
+            self._save({identity: fingerprint for identity, (fingerprint, _) in current.items()})
+        return diff
+
+    def _save(self, rows: Mapping[str, str]) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self._path, json.dumps({"version": SNAPSHOT_VERSION, "rows": rows}, ensure_ascii=False))
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date
 from pathlib import Path
-from typing import Optional
-
-from docxtpl import DocxTemplate
+from typing import Iterable, Optional
 
+from contract_bot.contracts.diff import contract_fingerprint
 from contract_bot.contracts.parser import ContractRecord, DocumentType
+from contract_bot.contracts.templates import CompiledTemplate, TemplateCache
+from contract_bot.utils.concurrency import available_cpus, process_pool
+from contract_bot.utils.files import atomic_write_bytes
 from contract_bot.utils.text import sanitize_filename
 
 DATE_FORMAT = "%d.%m.%Y"
+DOCUMENT_CACHE_DIR = "cache"
+DOCUMENT_MEMORY_ENTRIES = 256
+# в пул идут только документы, которым нужен docxtpl (~15 мс на документ): прямая подстановка
+# укладывается в доли миллисекунды и дешевле передачи задания в процесс. Запуск spawn-пула с импортом
+# pandas и openpyxl стоит около 2.5 с, поэтому холодный пул окупается от пары сотен документов,
+# а уже запущенный — от нескольких
+BATCH_POOL_MIN_JOBS = 200
+BATCH_WARM_POOL_MIN_JOBS = 4
 
 TEMPLATE_NAMES = {
     DocumentType.EXTENSION: "notify_extension.docx",
@@ -55,22 +71,57 @@ class DocumentContext:
         }
 
 
+@dataclass
+class DocumentCacheStats:
+    rendered: int = 0
+    from_memory: int = 0
+    from_disk: int = 0
+
+    def __str__(self) -> str:
+        return f"сформировано={self.rendered}, из памяти={self.from_memory}, с диска={self.from_disk}"
+
+
+@dataclass(frozen=True)
+class RenderedDocument:
+    key: str
+    filename: str
+    content: bytes
+    digest: str
+
+    @classmethod
+    def build(cls, key: str, filename: str, content: bytes) -> "RenderedDocument":
+        return cls(key=key, filename=filename, content=content, digest=hashlib.sha256(content).hexdigest())
+
+
 class DocumentGenerator:
-    def __init__(self, templates_dir: Path, output_dir: Path):
+    def __init__(
+        self,
+        templates_dir: Path,
+        output_dir: Path,
+        template_cache: TemplateCache | None = None,
+        max_workers: int | None = None,
+        archive: bool = True,
+        memory_entries: int = DOCUMENT_MEMORY_ENTRIES,
+    ):
         self._templates_dir = templates_dir
         self._output_dir = output_dir
         self._output_dir.mkdir(parents=True, exist_ok=True)
+        self._templates = template_cache or TemplateCache()
+        self._cache_dir = output_dir / DOCUMENT_CACHE_DIR
+        self._lock = threading.Lock()
+        self.stats = DocumentCacheStats()
+        self._max_workers = max_workers or available_cpus()
+        self._pool: ProcessPoolExecutor | None = None
+        # без архива документы живут только в памяти и уходят в Telegram прямо из байтов
+        self._archive = archive
+        self._memory: OrderedDict[str, RenderedDocument] = OrderedDict()
+        self._memory_entries = max(memory_entries, 1)
 
-    def render(
-        self,
-        record: ContractRecord,
-        context: DocumentContext | None = None,
-        doc_type: Optional[DocumentType] = None,
-    ) -> Path:
-        doc_type = doc_type or record.decide_document()
-        if doc_type is None:
-            raise ValueError("Cannot determine document type for record")
+    @property
+    def template_cache(self) -> TemplateCache:
+        return self._templates
 
+    def template_for(self, doc_type: DocumentType) -> CompiledTemplate:
         template_name = TEMPLATE_NAMES.get(doc_type)
         if not template_name:
             raise FileNotFoundError(f"Template not configured for {doc_type}")
@@ -78,22 +129,234 @@ class DocumentGenerator:
         template_path = self._templates_dir / template_name
         if not template_path.exists():
             raise FileNotFoundError(f"Template not found: {template_path}")
+        return self._templates.get(template_path)
+
+    def render_document(
+        self,
+        record: ContractRecord,
+        context: DocumentContext | None = None,
+        doc_type: Optional[DocumentType] = None,
+    ) -> RenderedDocument:
+        # один документ на запись: все получатели и следующие запуски берут готовый,
+        # пока не изменились строка таблицы, реквизиты или шаблон
+        doc_type = doc_type or record.decide_document()
+        if doc_type is None:
+            raise ValueError("Cannot determine document type for record")
 
-        tpl = DocxTemplate(template_path)
         context = context or DocumentContext(record=record)
-        if doc_type is DocumentType.EXTENSION:
-            payload = context.for_extension()
-        else:
-            payload = context.for_termination()
-
-        tpl.render(payload)
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{sanitize_filename(record.employee)}_{doc_type.value}.docx"
-        target_dir = self._output_dir / datetime.utcnow().strftime("%Y-%m-%d")
-        target_dir.mkdir(parents=True, exist_ok=True)
-        output_path = target_dir / filename
-        tpl.save(output_path)
-        return output_path
+        key = self.document_key(record, context, doc_type)
+        filename = _document_filename(record, doc_type)
+        document = self._lookup(key, filename)
+        if document is not None:
+            return document
+
+        content = self.template_for(doc_type).render_bytes(_payload(context, doc_type))
+        document = RenderedDocument.build(key, filename, content)
+        if self._archive:
+            self._write_archive(document)
+        with self._lock:
+            self.stats.rendered += 1
+            self._remember(document)
+        return document
+
+    def archive_path(self, document: RenderedDocument) -> Path:
+        path = self._cache_dir / document.key / document.filename
+        if not _touch(path):
+            self._write_archive(document)
+        return path
+
+    def submit_batch(self, jobs: Iterable[tuple[ContractRecord, DocumentType]]) -> list[Future[RenderedDocument]]:
+        # готовые документы возвращаются сразу; рендер через docxtpl упирается в процессор и GIL,
+        # поэтому большая пачка таких документов собирается в пуле процессов
+        futures: list[Future[RenderedDocument]] = []
+        heavy: list[tuple[Future[RenderedDocument], ContractRecord, DocumentType]] = []
+        for record, doc_type in jobs:
+            record = _plain_record(record)
+            future: Future[RenderedDocument] = Future()
+            futures.append(future)
+            context = DocumentContext(record=record)
+            key = self.document_key(record, context, doc_type)
+            document = self._lookup(key, _document_filename(record, doc_type))
+            if document is not None:
+                future.set_result(document)
+            elif self.template_for(doc_type).renders_directly(_payload(context, doc_type)):
+                self._render_inline(future, record, doc_type)
+            else:
+                heavy.append((future, record, doc_type))
+
+        threshold = BATCH_WARM_POOL_MIN_JOBS if self._pool is not None else BATCH_POOL_MIN_JOBS
+        if len(heavy) < threshold or self._max_workers <= 1:
+            for future, record, doc_type in heavy:
+                self._render_inline(future, record, doc_type)
+            return futures
+
+        for future, record, doc_type in heavy:
+            self._submit(future, record, doc_type)
+        return futures
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _submit(self, target: Future[RenderedDocument], record: ContractRecord, doc_type: DocumentType) -> None:
+        # пул, у которого погиб процесс (OOM, kill), больше не принимает задач: он пересоздаётся один раз,
+        # а если и это не помогло, документ собирается в текущем процессе
+        for _ in range(2):
+            pool = self._ensure_pool()
+            try:
+                pool_future = pool.submit(
+                    _render_in_worker,
+                    self._templates_dir,
+                    self._output_dir,
+                    self._archive,
+                    record,
+                    doc_type,
+                )
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                continue
+            pool_future.add_done_callback(
+                lambda done: self._resolve(target, done, pool, record, doc_type)
+            )
+            return
+        self._render_inline(target, record, doc_type)
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = process_pool(self._max_workers)
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _render_inline(self, target: Future[RenderedDocument], record: ContractRecord, doc_type: DocumentType) -> None:
+        try:
+            target.set_result(self.render_document(record, doc_type=doc_type))
+        except Exception as exc:  # noqa: BLE001
+            target.set_exception(exc)
+
+    def _lookup(self, key: str, filename: str) -> RenderedDocument | None:
+        with self._lock:
+            document = self._memory.get(key)
+            if document is not None:
+                self._memory.move_to_end(key)
+                self.stats.from_memory += 1
+                return document
+        if not self._archive:
+            return None
+
+        path = self._cache_dir / key / filename
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        _touch(path)
+        document = RenderedDocument.build(key, filename, content)
+        with self._lock:
+            self.stats.from_disk += 1
+            self._remember(document)
+        return document
+
+    def _remember(self, document: RenderedDocument) -> None:
+        self._memory[document.key] = document
+        self._memory.move_to_end(document.key)
+        while len(self._memory) > self._memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write_archive(self, document: RenderedDocument) -> None:
+        path = self._cache_dir / document.key / document.filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, document.content)
+
+    def _resolve(
+        self,
+        target: Future[RenderedDocument],
+        done: Future[RenderedDocument],
+        pool: ProcessPoolExecutor,
+        record: ContractRecord,
+        doc_type: DocumentType,
+    ) -> None:
+        if done.cancelled():
+            target.cancel()
+            return
+        exc = done.exception()
+        if isinstance(exc, BrokenProcessPool):
+            # процесс погиб посреди рендера: следующая пачка получит новый пул, этот документ собирается здесь
+            self._discard_pool(pool)
+            self._render_inline(target, record, doc_type)
+            return
+        if exc is not None:
+            target.set_exception(exc)
+            return
+        document = done.result()
+        with self._lock:
+            self.stats.rendered += 1
+            self._remember(document)
+        target.set_result(document)
+
+    def document_key(self, record: ContractRecord, context: DocumentContext, doc_type: DocumentType) -> str:
+        digest = hashlib.sha1()
+        parts = (
+            contract_fingerprint(record),
+            doc_type.value,
+            self.template_for(doc_type).digest,
+            context.document_number,
+            context.director_name,
+            context.director_signature,
+        )
+        for part in parts:
+            digest.update(f"{part}\x1f".encode("utf-8"))
+        return digest.hexdigest()[:20]
+
+
+_worker_generators: dict[tuple[Path, Path, bool], DocumentGenerator] = {}
+
+
+def _render_in_worker(
+    templates_dir: Path,
+    output_dir: Path,
+    archive: bool,
+    record: ContractRecord,
+    doc_type: DocumentType,
+) -> RenderedDocument:
+    # генератор живёт всё время жизни процесса, чтобы шаблоны компилировались один раз
+    generator = _worker_generators.get((templates_dir, output_dir, archive))
+    if generator is None:
+        generator = DocumentGenerator(templates_dir, output_dir, max_workers=1, archive=archive, memory_entries=1)
+        _worker_generators[(templates_dir, output_dir, archive)] = generator
+    return generator.render_document(record, doc_type=doc_type)
+
+
+def _document_filename(record: ContractRecord, doc_type: DocumentType) -> str:
+    return f"{sanitize_filename(record.employee)}_{doc_type.value}.docx"
+
+
+def _touch(path: Path) -> bool:
+    # время изменения архива — время последнего использования: по нему чистка выбирает, что удалить
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _plain_record(record: ContractRecord) -> ContractRecord:
+    # строка колоночной таблицы тянет за собой всю таблицу, в процесс передаётся обычная запись
+    if isinstance(record, ContractRecord):
+        return record
+    return record.to_record()
+
+
+def _payload(context: DocumentContext, doc_type: DocumentType) -> dict[str, str]:
+    if doc_type is DocumentType.EXTENSION:
+        return context.for_extension()
+    return context.for_termination()
 
 
 def format_date(value: date | None) -> str:
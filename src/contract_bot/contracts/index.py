@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import List, Sequence
+
+from contract_bot.contracts.parser import ContractRecord
+from contract_bot.contracts.table import NO_DATE, ContractTable
+
+
+class ContractIndex:
+    def __init__(self, records: Sequence[ContractRecord]) -> None:
+        self.source = records
+        if isinstance(records, ContractTable):
+            ordinals = records.ordinals("end_date")
+        else:
+            ordinals = array("i", (
+                record.end_date.toordinal() if record.end_date else NO_DATE
+                for record in records
+            ))
+
+        # стабильная сортировка сохраняет порядок строк таблицы внутри одной даты
+        dated = [row for row, ordinal in enumerate(ordinals) if ordinal != NO_DATE]
+        dated.sort(key=ordinals.__getitem__)
+        self._size = len(ordinals)
+        self._positions = array("I", dated)
+        self._ordinals = array("i", (ordinals[row] for row in dated))
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def undated(self) -> int:
+        return self._size - len(self._positions)
+
+    def between(self, start: date, end: date) -> List[ContractRecord]:
+        low = bisect_left(self._ordinals, start.toordinal())
+        high = bisect_right(self._ordinals, end.toordinal())
+        return [self.source[row] for row in self._positions[low:high]]
+
+    def upcoming(self, today: date, days: int) -> List[ContractRecord]:
+        return self.between(today, today + timedelta(days=days))
+
+    def count_before(self, day: date) -> int:
+        return bisect_left(self._ordinals, day.toordinal())
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import date
 from enum import Enum
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, List
+from types import MappingProxyType
+from typing import Callable, Iterable, Iterator, List, Mapping, Sequence
 
 import pandas as pd
+from openpyxl.cell.cell import ERROR_CODES
+
+from contract_bot.contracts.dates import coerce_date
+from contract_bot.contracts.workbook import CALAMINE_MODULE, CALAMINE_SUFFIXES, WorkbookSession, module_available
 
 DEFAULT_SHEET_NAMES = ("Контроль", "��������", "Sheet2", "Лист1")
 HEADER_ROW_INDEX = 6
+# увеличивать при любом изменении логики разбора: версия входит в ключ кеша
+PARSER_VERSION = "3"
 
 
 class DocumentType(str, Enum):
@@ -33,21 +43,30 @@ class ContractRecord:
     extension_start_date: date | None
     extension_end_date: date | None
     document_hint: str | None
+    source: str | None = None
 
     def decide_document(self) -> DocumentType | None:
-        mark = _normalize_mark(self.readiness_mark)
-        if mark in {"П", "Н"}:
-            return DocumentType.EXTENSION
-        if mark in {"И", "У"}:
+        return classify_document(self.readiness_mark, self.document_hint, self.notification_label)
+
+
+def classify_document(
+    readiness_mark: str | None,
+    document_hint: str | None,
+    notification_label: str | None,
+) -> DocumentType | None:
+    mark = _normalize_mark(readiness_mark)
+    if mark in {"П", "Н"}:
+        return DocumentType.EXTENSION
+    if mark in {"И", "У"}:
+        return DocumentType.TERMINATION
+    hint = document_hint or notification_label
+    if hint:
+        lower = hint.lower()
+        if "увольн" in lower:
             return DocumentType.TERMINATION
-        hint = self.document_hint or self.notification_label
-        if hint:
-            lower = hint.lower()
-            if "увольн" in lower:
-                return DocumentType.TERMINATION
-            if "продл" in lower:
-                return DocumentType.EXTENSION
-        return None
+        if "продл" in lower:
+            return DocumentType.EXTENSION
+    return None
 
 
 COLUMN_ALIASES: dict[str, Iterable[str]] = {
@@ -101,14 +120,242 @@ COLUMN_INDEX_FALLBACK = {
 }
 
 
-def parse_contracts(path: Path) -> List[ContractRecord]:
-    if not path.exists():
-        raise FileNotFoundError(f"Excel file not found: {path}")
+STRING_FIELDS = {
+    "organization": "organization",
+    "employee": "employee",
+    "position": "position",
+    "contract_number": "contract_number",
+    "notification_label": "notification",
+    "readiness_mark": "readiness",
+    "extension_term": "extension_term",
+}
+
+DATE_FIELDS = {
+    "contract_date": "contract_date",
+    "start_date": "start_date",
+    "end_date": "end_date",
+    "reminder_date": "reminder_date",
+    "extension_start_date": "extension_start",
+    "extension_end_date": "extension_end",
+}
+
+
+RECORD_COLUMN_KEYS = (*STRING_FIELDS.values(), *DATE_FIELDS.values())
 
-    sheet_name = _detect_sheet(path)
-    df = pd.read_excel(path, sheet_name=sheet_name, header=HEADER_ROW_INDEX)
-    df = df.dropna(subset=[_resolve_column(df, "employee")], how="all")
 
+@dataclass(frozen=True)
+class ColumnSchema:
+    fingerprint: str
+    width: int
+    positions: Mapping[str, int]
+    hint_positions: tuple[int, ...]
+
+    def position(self, key: str) -> int:
+        try:
+            return self.positions[key]
+        except KeyError:
+            raise KeyError(f"Cannot resolve column for {key}") from None
+
+    def require(self, keys: Iterable[str]) -> dict[str, int]:
+        return {key: self.position(key) for key in keys}
+
+
+@lru_cache(maxsize=16)
+def resolve_schema(columns: tuple[str, ...]) -> ColumnSchema:
+    # заголовок разбирается один раз: пока он не меняется, строки читаются по позициям
+    positions: dict[str, int] = {}
+    for key in COLUMN_INDEX_FALLBACK:
+        try:
+            positions[key] = _resolve_position(columns, key)
+        except KeyError:
+            continue
+    hint_positions = tuple(
+        index
+        for index, name in enumerate(columns)
+        if "документ" in name.lower() or "тип" in name.lower()
+    )
+    fingerprint = hashlib.sha1("\x1f".join(columns).encode("utf-8")).hexdigest()[:16]
+    return ColumnSchema(
+        fingerprint=fingerprint,
+        width=len(columns),
+        positions=MappingProxyType(positions),
+        hint_positions=hint_positions,
+    )
+
+
+@dataclass(frozen=True)
+class ReaderBackend:
+    name: str
+    suffixes: frozenset[str]
+    load: Callable[[WorkbookSession, str | None], List[ContractRecord]]
+    requires: str | None = None
+
+    @property
+    def available(self) -> bool:
+        return self.requires is None or module_available(self.requires)
+
+    def supports(self, path: Path) -> bool:
+        return path.suffix.lower() in self.suffixes
+
+
+def parse_contracts(
+    path: Path,
+    *,
+    vectorized: bool = True,
+    session: WorkbookSession | None = None,
+    sheet_name: str | None = None,
+    backend: str | None = None,
+) -> List[ContractRecord]:
+    if session is None:
+        with WorkbookSession(path) as owned:
+            return parse_contracts(
+                path,
+                vectorized=vectorized,
+                session=owned,
+                sheet_name=sheet_name,
+                backend=backend,
+            )
+
+    if not vectorized and not session.is_csv:
+        # построчный разбор через pandas остаётся эталоном для сверки остальных способов
+        df = session.read_frame(sheet_name or _detect_sheet(session), header=HEADER_ROW_INDEX)
+        df = df.dropna(subset=[_resolve_column(df, "employee")], how="all")
+        session.reader = "rowwise"
+        return _build_records_rowwise(df)
+
+    reader = select_backend(path, backend)
+    records = reader.load(session, sheet_name)
+    session.reader = reader.name
+    return records
+
+
+def select_backend(path: Path, name: str | None = None) -> ReaderBackend:
+    if name:
+        reader = READER_BACKENDS.get(name)
+        if reader is None:
+            raise ValueError(f"Unknown reader backend: {name}")
+        if not reader.available:
+            raise RuntimeError(f"Reader backend {name} requires {reader.requires}")
+        if not reader.supports(path):
+            raise ValueError(f"Reader backend {name} does not support {path.suffix} files")
+        return reader
+
+    # бэкенды перечислены от самого быстрого к самому универсальному
+    for reader in READER_BACKENDS.values():
+        if reader.available and reader.supports(path):
+            return reader
+    raise ValueError(f"No reader backend for {path.suffix} files")
+
+
+def available_backends() -> list[str]:
+    return [name for name, reader in READER_BACKENDS.items() if reader.available]
+
+
+def iter_contracts(
+    path: Path,
+    *,
+    session: WorkbookSession | None = None,
+) -> Iterator[ContractRecord]:
+    if session is None:
+        with WorkbookSession(path) as owned:
+            yield from iter_contracts(path, session=owned)
+        return
+
+    # потоковое чтение есть у openpyxl, xlrd и CSV, остальные форматы разбираются целиком
+    if not (session.is_csv or session.is_openpyxl or session.is_xlrd):
+        yield from parse_contracts(path, session=session)
+        return
+
+    session.reader = "csv" if session.is_csv else "streaming"
+    yield from _records_from_rows(
+        session.iter_rows(_pick_sheet_name(session.sheet_names), HEADER_ROW_INDEX + 1)
+    )
+
+
+def _records_from_rows(rows: Iterator[Sequence[object]]) -> Iterator[ContractRecord]:
+    header = next(rows, None)
+    if header is None:
+        return
+
+    schema = resolve_schema(tuple(_header_names(header)))
+    employee_index = schema.position("employee")
+    positions: dict[str, int] | None = None
+
+    for row in rows:
+        employee = _coerce_cell_str(_cell(row, employee_index))
+        if not employee:
+            continue
+        if positions is None:
+            positions = schema.require(RECORD_COLUMN_KEYS)
+
+        end_date = _coerce_cell_date(_cell(row, positions["end_date"]))
+        if end_date is None:
+            continue
+
+        hint = None
+        for index in schema.hint_positions:
+            hint = _coerce_to_str(_cell(row, index))
+            if hint:
+                break
+
+        yield ContractRecord(
+            organization=_coerce_cell_str(_cell(row, positions["organization"])) or "",
+            employee=employee,
+            position=_coerce_cell_str(_cell(row, positions["position"])),
+            contract_number=_coerce_cell_str(_cell(row, positions["contract_number"])),
+            contract_date=_coerce_cell_date(_cell(row, positions["contract_date"])),
+            start_date=_coerce_cell_date(_cell(row, positions["start_date"])),
+            end_date=end_date,
+            reminder_date=_coerce_cell_date(_cell(row, positions["reminder_date"])),
+            notification_label=_coerce_cell_str(_cell(row, positions["notification"])),
+            readiness_mark=_coerce_cell_str(_cell(row, positions["readiness"])),
+            extension_term=_coerce_cell_str(_cell(row, positions["extension_term"])),
+            extension_start_date=_coerce_cell_date(_cell(row, positions["extension_start"])),
+            extension_end_date=_coerce_cell_date(_cell(row, positions["extension_end"])),
+            document_hint=hint,
+        )
+
+
+def _load_with_pandas(session: WorkbookSession, sheet_name: str | None) -> List[ContractRecord]:
+    df = session.read_frame(sheet_name or _detect_sheet(session), header=HEADER_ROW_INDEX)
+    schema = resolve_schema(tuple(str(column) for column in df.columns))
+    df = df.dropna(subset=[df.columns[schema.position("employee")]], how="all")
+    return _build_records_columnar(df, schema)
+
+
+def _load_rows(session: WorkbookSession, sheet_name: str | None) -> List[ContractRecord]:
+    # openpyxl в режиме read-only, xlrd и CSV отдают строки без промежуточного DataFrame
+    sheet_name = sheet_name or _pick_sheet_name(session.sheet_names)
+    return list(_records_from_rows(session.iter_rows(sheet_name, HEADER_ROW_INDEX + 1)))
+
+
+def _load_with_calamine(session: WorkbookSession, sheet_name: str | None) -> List[ContractRecord]:
+    # книга уже открыта сессией: sheet_sync читал через неё названия листов и горизонт
+    workbook = session.calamine
+    names = list(workbook.sheet_names)
+    sheet_name = sheet_name or _pick_sheet_name(names) or names[0]
+    rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+    return list(_records_from_rows(islice(iter(rows), HEADER_ROW_INDEX, None)))
+
+
+READER_BACKENDS: dict[str, ReaderBackend] = {
+    reader.name: reader
+    for reader in (
+        ReaderBackend("csv", frozenset({".csv"}), _load_rows),
+        ReaderBackend(
+            "calamine",
+            CALAMINE_SUFFIXES,
+            _load_with_calamine,
+            requires=CALAMINE_MODULE,
+        ),
+        ReaderBackend("openpyxl", frozenset({".xlsx", ".xlsm"}), _load_rows),
+        ReaderBackend("xlrd", frozenset({".xls"}), _load_rows),
+        ReaderBackend("pandas", frozenset({".xlsx", ".xlsm", ".xls", ".xlsb", ".ods"}), _load_with_pandas),
+    )
+}
+
+
+def _build_records_rowwise(df: pd.DataFrame) -> List[ContractRecord]:
     records: List[ContractRecord] = []
     for _, row in df.iterrows():
         organization = _get_str(row, df, "organization")
@@ -139,17 +386,107 @@ def parse_contracts(path: Path) -> List[ContractRecord]:
     return records
 
 
-def _detect_sheet(path: Path) -> int | str:
-    try:
-        xls = pd.ExcelFile(path)
-    except ValueError:
-        return 0
+def _build_records_columnar(df: pd.DataFrame, schema: ColumnSchema) -> List[ContractRecord]:
+    # колонки берутся по позициям из схемы заголовка, значения приводятся целыми столбцами
+    if df.empty:
+        return []
+
+    def column(key: str) -> pd.Series:
+        return df.iloc[:, schema.position(key)]
+
+    organizations = _coerce_str_column(column("organization"))
+    employees = _coerce_str_column(column("employee"))
+    if not any(employees):
+        return []
+
+    columns: dict[str, list] = {}
+    for field, key in STRING_FIELDS.items():
+        if field in {"organization", "employee"}:
+            continue
+        columns[field] = _coerce_str_column(column(key))
+    for field, key in DATE_FIELDS.items():
+        columns[field] = _coerce_date_column(column(key))
 
+    hint_columns = [
+        [_coerce_to_str(value) for value in df.iloc[:, index].tolist()]
+        for index in schema.hint_positions
+    ]
+
+    records: List[ContractRecord] = []
+    for position, employee in enumerate(employees):
+        if not employee:
+            continue
+        end_date = columns["end_date"][position]
+        if end_date is None:
+            continue
+
+        hint = None
+        for values in hint_columns:
+            if values[position]:
+                hint = values[position]
+                break
+
+        records.append(
+            ContractRecord(
+                organization=organizations[position] or "",
+                employee=employee,
+                position=columns["position"][position],
+                contract_number=columns["contract_number"][position],
+                contract_date=columns["contract_date"][position],
+                start_date=columns["start_date"][position],
+                end_date=end_date,
+                reminder_date=columns["reminder_date"][position],
+                notification_label=columns["notification_label"][position],
+                readiness_mark=columns["readiness_mark"][position],
+                extension_term=columns["extension_term"][position],
+                extension_start_date=columns["extension_start_date"][position],
+                extension_end_date=columns["extension_end_date"][position],
+                document_hint=hint,
+            )
+        )
+
+    return records
+
+
+def _detect_sheet(session: WorkbookSession) -> int | str:
+    return _pick_sheet_name(session.sheet_names) or 0
+
+
+def _pick_sheet_name(sheet_names: Sequence[str]) -> str | None:
     for preferred in DEFAULT_SHEET_NAMES:
-        for name in xls.sheet_names:
+        for name in sheet_names:
             if name == preferred:
                 return name
-    return 0
+    return None
+
+
+def _header_names(header: Sequence[object]) -> list[str]:
+    # повторяем именование pandas: пустые заголовки превращаются в "Unnamed: N"
+    names: list[str] = []
+    for index, value in enumerate(header):
+        if value is None or value == "":
+            names.append(f"Unnamed: {index}")
+        else:
+            names.append(str(value))
+    return names
+
+
+def _resolve_position(columns: Sequence[str], key: str) -> int:
+    for alias in COLUMN_ALIASES.get(key, ()):
+        if alias in columns:
+            return columns.index(alias)
+    index = COLUMN_INDEX_FALLBACK.get(key)
+    if index is None or index >= len(columns):
+        raise KeyError(f"Cannot resolve column for {key}")
+    return index
+
+
+def _cell(row: Sequence[object], index: int) -> object:
+    value = row[index] if index < len(row) else None
+    # pandas превращает ошибки формул (#VALUE! и т.п.) и пустые строки CSV в пустые значения
+    if isinstance(value, str) and (value in ERROR_CODES or value == ""):
+        return None
+    return value
 
 
 def _resolve_column(df: pd.DataFrame, key: str) -> str:
@@ -165,7 +502,15 @@ def _resolve_column(df: pd.DataFrame, key: str) -> str:
 
 def _get_str(row: pd.Series, df: pd.DataFrame, key: str) -> str | None:
     column = _resolve_column(df, key)
-    value = row.get(column)
+    return _coerce_cell_str(row.get(column))
+
+
+def _get_date(row: pd.Series, df: pd.DataFrame, key: str) -> date | None:
+    column = _resolve_column(df, key)
+    return _coerce_cell_date(row.get(column))
+
+
+def _coerce_cell_str(value: object) -> str | None:
     if pd.isna(value):
         return None
     if isinstance(value, (float, int)):
@@ -175,31 +520,35 @@ def _get_str(row: pd.Series, df: pd.DataFrame, key: str) -> str | None:
     return text or None
 
 
-def _get_date(row: pd.Series, df: pd.DataFrame, key: str) -> date | None:
-    column = _resolve_column(df, key)
-    value = row.get(column)
-    if pd.isna(value):
-        return None
-    if isinstance(value, pd.Timestamp):
-        return value.date()
-    if isinstance(value, datetime):
-        return value.date()
-    if isinstance(value, date):
-        return value
-    parsed = pd.to_datetime(value, errors="coerce")
-    if pd.isna(parsed):
-        return None
-    return parsed.date()
+def _coerce_cell_date(value: object) -> date | None:
+    return coerce_date(value)
 
 
-def _find_document_hint(row: pd.Series, df: pd.DataFrame) -> str | None:
+def _coerce_str_column(series: pd.Series) -> list[str | None]:
+    return [_coerce_cell_str(value) for value in series.tolist()]
+
+
+def _coerce_date_column(series: pd.Series) -> list[date | None]:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return [None if pd.isna(value) else value.date() for value in series.tolist()]
+    return [coerce_date(value) for value in series.tolist()]
+
+
+def _document_hint_columns(df: pd.DataFrame) -> list:
+    columns = []
     for column in df.columns:
         name = str(column).lower()
         if "документ" in name or "тип" in name:
-            value = row.get(column)
-            text = _coerce_to_str(value)
-            if text:
-                return text
+            columns.append(column)
+    return columns
+
+
+def _find_document_hint(row: pd.Series, df: pd.DataFrame) -> str | None:
+    for column in _document_hint_columns(df):
+        value = row.get(column)
+        text = _coerce_to_str(value)
+        if text:
+            return text
     return None
 
 
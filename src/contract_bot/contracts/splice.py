@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import html
+import re
+import zipfile
+from bisect import bisect_right
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Mapping
+
+DOCUMENT_PART = "word/document.xml"
+TEXT_NODE = re.compile(r"(<w:t(?:\s[^>]*)?>)([^<]*)</w:t>")
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+# всё, что Jinja понимает сверх подстановки переменной, отдаётся docxtpl
+JINJA_MARKERS = ("{{", "}}", "{%", "%}", "{#", "#}", "{_", "_}")
+PRESERVED_TEXT_TAG = '<w:t xml:space="preserve">'
+LINE_BREAK = '</w:t><w:br/><w:t xml:space="preserve">'
+# табуляции, новые абзацы и разрывы страниц docxtpl превращает в разметку абзацев
+UNSUPPORTED_CHARS = ("\t", "\a", "\f")
+# фиксированная дата записей архива: одинаковые данные дают одинаковые байты
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class SplicePlan:
+    # куски document.xml: строка — готовый XML, None — место для значения из names
+    chunks: tuple[str | None, ...]
+    names: tuple[str, ...]
+    archive_prefix: bytes
+
+    @classmethod
+    def build(cls, source: bytes) -> "SplicePlan | None":
+        with zipfile.ZipFile(BytesIO(source)) as archive:
+            if DOCUMENT_PART not in archive.namelist():
+                return None
+            for info in archive.infolist():
+                if info.filename != DOCUMENT_PART and info.filename.endswith(".xml"):
+                    text = archive.read(info).decode("utf-8", errors="ignore")
+                    if any(marker in text for marker in JINJA_MARKERS):
+                        return None
+            xml = archive.read(DOCUMENT_PART).decode("utf-8")
+            prefix = _archive_without(archive, DOCUMENT_PART)
+
+        plan = _plan_document(xml)
+        if plan is None:
+            return None
+        chunks, names = plan
+        return cls(chunks=chunks, names=names, archive_prefix=prefix)
+
+    def accepts(self, payload: Mapping[str, object]) -> bool:
+        for name in self.names:
+            value = payload.get(name)
+            if value is not None and any(char in str(value) for char in UNSUPPORTED_CHARS):
+                return False
+        return True
+
+    def render(self, payload: Mapping[str, object]) -> bytes:
+        values = iter(self.names)
+        parts = []
+        for chunk in self.chunks:
+            if chunk is not None:
+                parts.append(chunk)
+                continue
+            value = payload.get(next(values))
+            text = "" if value is None else html.escape(str(value), quote=False)
+            parts.append(text.replace("\n", LINE_BREAK))
+        document = "".join(parts).encode("utf-8")
+
+        buffer = BytesIO()
+        buffer.write(self.archive_prefix)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(_zip_info(DOCUMENT_PART), document)
+        return buffer.getvalue()
+
+
+def _plan_document(xml: str) -> tuple[tuple[str | None, ...], tuple[str, ...]] | None:
+    nodes = list(TEXT_NODE.finditer(xml))
+    if any(marker in TEXT_NODE.sub("", xml) for marker in JINJA_MARKERS):
+        return None
+
+    # плейсхолдер ищется в тексте абзаца целиком: Word может разрезать его на несколько w:r
+    paragraph_ends = [match.end() for match in re.finditer(r"</w:p>", xml)]
+    paragraphs: dict[int, list[int]] = {}
+    for index, node in enumerate(nodes):
+        paragraphs.setdefault(bisect_right(paragraph_ends, node.start()), []).append(index)
+
+    # для каждого текстового узла: список (начало, конец, имя) вырезаемых участков
+    edits: dict[int, list[tuple[int, int, str | None]]] = {}
+    for members in paragraphs.values():
+        spans: list[tuple[int, int, int]] = []
+        text = ""
+        for index in members:
+            value = nodes[index].group(2)
+            spans.append((index, len(text), len(text) + len(value)))
+            text += value
+
+        leftover = PLACEHOLDER.sub("", text)
+        if any(marker in leftover for marker in JINJA_MARKERS):
+            return None
+
+        for match in PLACEHOLDER.finditer(text):
+            for index, start, end in spans:
+                cut_start, cut_end = max(match.start(), start), min(match.end(), end)
+                if cut_start >= cut_end:
+                    continue
+                # значение встаёт на место начала плейсхолдера, хвосты в соседних узлах удаляются
+                name = match.group(1) if start <= match.start() < end else None
+                edits.setdefault(index, []).append((cut_start - start, cut_end - start, name))
+
+    chunks: list[str | None] = []
+    names: list[str] = []
+    position = 0
+    for index, node in enumerate(nodes):
+        node_edits = edits.get(index)
+        if not node_edits:
+            continue
+        opening, value = node.group(1), node.group(2)
+        chunks.append(xml[position:node.start()])
+        chunks.append(PRESERVED_TEXT_TAG if opening == "<w:t>" else opening)
+        cursor = 0
+        for start, end, name in node_edits:
+            chunks.append(value[cursor:start])
+            if name is not None:
+                chunks.append(None)
+                names.append(name)
+            cursor = end
+        chunks.append(value[cursor:] + "</w:t>")
+        position = node.end()
+    chunks.append(xml[position:])
+
+    if not names:
+        return None
+    return _merge_static(chunks), tuple(names)
+
+
+def _merge_static(chunks: list[str | None]) -> tuple[str | None, ...]:
+    merged: list[str | None] = []
+    for chunk in chunks:
+        if chunk is not None and merged and merged[-1] is not None:
+            merged[-1] += chunk
+        elif chunk != "":
+            merged.append(chunk)
+    return tuple(merged)
+
+
+def _archive_without(archive: zipfile.ZipFile, excluded: str) -> bytes:
+    # неизменные части архива сжимаются один раз, на каждый документ дописывается только document.xml
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in archive.infolist():
+            if info.filename != excluded:
+                target.writestr(_zip_info(info.filename), archive.read(info))
+    return buffer.getvalue()
+
+
+def _zip_info(name: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date
+from typing import Iterable, Iterator, List
+
+from contract_bot.contracts.parser import ContractRecord, DocumentType, classify_document
+
+# строки, которые повторяются от строки к строке, хранятся один раз в общем пуле
+POOLED_FIELDS = (
+    "organization",
+    "position",
+    "notification_label",
+    "readiness_mark",
+    "extension_term",
+    "document_hint",
+    "source",
+)
+PLAIN_FIELDS = ("employee", "contract_number")
+DATE_COLUMNS = (
+    "contract_date",
+    "start_date",
+    "end_date",
+    "reminder_date",
+    "extension_start_date",
+    "extension_end_date",
+)
+NO_DATE = 0
+
+
+class ContractTable:
+    def __init__(self) -> None:
+        self._pool: List[str | None] = [None]
+        self._pool_index: dict[str, int] = {}
+        self._pooled = {name: array("I") for name in POOLED_FIELDS}
+        self._plain: dict[str, List[str | None]] = {name: [] for name in PLAIN_FIELDS}
+        self._dates = {name: array("i") for name in DATE_COLUMNS}
+        self._decisions: List[DocumentType | None] | None = None
+
+    @classmethod
+    def from_records(cls, records: Iterable[ContractRecord]) -> "ContractTable":
+        table = cls()
+        for record in records:
+            table.append(record)
+        return table
+
+    def append(self, record: ContractRecord) -> None:
+        for name in POOLED_FIELDS:
+            self._pooled[name].append(self._intern(getattr(record, name)))
+        for name in PLAIN_FIELDS:
+            self._plain[name].append(getattr(record, name))
+        for name in DATE_COLUMNS:
+            value = getattr(record, name)
+            self._dates[name].append(value.toordinal() if value else NO_DATE)
+        self._decisions = None
+
+    def __len__(self) -> int:
+        return len(self._plain["employee"])
+
+    def __getitem__(self, row: int) -> "ContractRow":
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("ContractTable index out of range")
+        return ContractRow(self, row)
+
+    def __iter__(self) -> Iterator["ContractRow"]:
+        for row in range(len(self)):
+            yield ContractRow(self, row)
+
+    def ordinals(self, name: str) -> array:
+        return self._dates[name]
+
+    def to_record(self, row: int) -> ContractRecord:
+        values: dict[str, object] = {}
+        for name in POOLED_FIELDS:
+            values[name] = self._pool[self._pooled[name][row]]
+        for name in PLAIN_FIELDS:
+            values[name] = self._plain[name][row]
+        for name in DATE_COLUMNS:
+            values[name] = _from_ordinal(self._dates[name][row])
+        return ContractRecord(**values)
+
+    def classify(self) -> List[DocumentType | None]:
+        # решение зависит только от отметки и подсказок, поэтому считается
+        # один раз на каждое уникальное сочетание значений из пула
+        if self._decisions is None:
+            memo: dict[tuple[int, int, int], DocumentType | None] = {}
+            decisions: List[DocumentType | None] = []
+            marks = self._pooled["readiness_mark"]
+            hints = self._pooled["document_hint"]
+            labels = self._pooled["notification_label"]
+            for mark, hint, label in zip(marks, hints, labels):
+                key = (mark, hint, label)
+                if key not in memo:
+                    memo[key] = classify_document(self._pool[mark], self._pool[hint], self._pool[label])
+                decisions.append(memo[key])
+            self._decisions = decisions
+        return self._decisions
+
+    def _intern(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        index = self._pool_index.get(value)
+        if index is None:
+            index = self._pool_index[value] = len(self._pool)
+            self._pool.append(value)
+        return index
+
+
+def _from_ordinal(value: int) -> date | None:
+    return date.fromordinal(value) if value != NO_DATE else None
+
+
+def _pooled_property(name: str) -> property:
+    def getter(self: "ContractRow") -> str | None:
+        table = self._table
+        return table._pool[table._pooled[name][self._row]]
+
+    return property(getter)
+
+
+def _plain_property(name: str) -> property:
+    def getter(self: "ContractRow") -> str | None:
+        return self._table._plain[name][self._row]
+
+    return property(getter)
+
+
+def _date_property(name: str) -> property:
+    def getter(self: "ContractRow") -> date | None:
+        return _from_ordinal(self._table._dates[name][self._row])
+
+    return property(getter)
+
+
+class ContractRow:
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: ContractTable, row: int) -> None:
+        self._table = table
+        self._row = row
+
+    organization = _pooled_property("organization")
+    position = _pooled_property("position")
+    notification_label = _pooled_property("notification_label")
+    readiness_mark = _pooled_property("readiness_mark")
+    extension_term = _pooled_property("extension_term")
+    document_hint = _pooled_property("document_hint")
+    source = _pooled_property("source")
+    employee = _plain_property("employee")
+    contract_number = _plain_property("contract_number")
+    contract_date = _date_property("contract_date")
+    start_date = _date_property("start_date")
+    end_date = _date_property("end_date")
+    reminder_date = _date_property("reminder_date")
+    extension_start_date = _date_property("extension_start_date")
+    extension_end_date = _date_property("extension_end_date")
+
+    def decide_document(self) -> DocumentType | None:
+        return self._table.classify()[self._row]
+
+    def to_record(self) -> ContractRecord:
+        return self._table.to_record(self._row)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ContractRow):
+            return self.to_record() == other.to_record()
+        if isinstance(other, ContractRecord):
+            return self.to_record() == other
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(self.to_record())
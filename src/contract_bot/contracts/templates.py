@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import threading
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable
+
+from docx import Document
+from docx.document import Document as DocxDocument
+from docx.opc.part import Part
+from docxtpl import DocxTemplate
+from jinja2 import Environment, Template
+
+from contract_bot.contracts.splice import SplicePlan
+
+
+@dataclass
+class TemplateCacheStats:
+    hits: int = 0
+    loads: int = 0
+    compiles: int = 0
+    direct: int = 0
+    docxtpl: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"из кеша={self.hits}, загружено={self.loads}, скомпилировано={self.compiles}, "
+            f"напрямую={self.direct}, через docxtpl={self.docxtpl}"
+        )
+
+
+class _CompilingEnvironment(Environment):
+    # docxtpl компилирует XML документа через from_string на каждом рендере;
+    # для неизменного шаблона исходник один и тот же, поэтому результат запоминается
+    def __init__(self, stats: TemplateCacheStats) -> None:
+        # значения экранируются так же, как в прямой подстановке: «&» и «<» в названиях не ломают XML
+        super().__init__(autoescape=True)
+        self._compiled: dict[str, Template] = {}
+        self._lock = threading.Lock()
+        self._stats = stats
+
+    def from_string(  # type: ignore[override]
+        self,
+        source: str,
+        globals: dict[str, Any] | None = None,
+        template_class: type[Template] | None = None,
+    ) -> Template:
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        template = self._compiled.get(source)
+        if template is None:
+            template = super().from_string(source)
+            with self._lock:
+                self._compiled[source] = template
+                self._stats.compiles += 1
+        return template
+
+
+class _PreparedDocxTemplate(DocxTemplate):
+    def __init__(self, compiled: "CompiledTemplate") -> None:
+        super().__init__(BytesIO(compiled.source))
+        self._compiled = compiled
+
+    def init_docx(self, reload: bool = True) -> None:
+        if not self.docx or (self.is_rendered and reload):
+            self.docx = self._compiled.clone()
+            self.is_rendered = False
+
+    def patch_xml(self, src_xml: str) -> str:
+        return self._compiled.patch(src_xml, super().patch_xml)
+
+
+class CompiledTemplate:
+    def __init__(self, path: Path, source: bytes, stats: TemplateCacheStats) -> None:
+        self.path = path
+        self.source = source
+        self.digest = hashlib.sha256(source).hexdigest()
+        self.environment = _CompilingEnvironment(stats)
+        self._patched: dict[str, str] = {}
+        self._stats = stats
+        self._prototype = Document(BytesIO(source))
+        self._shared = _read_only_parts(self._prototype)
+        # простые шаблоны с одними {{ имя }} заполняются без docxtpl по заранее разобранному плану
+        self.plan = SplicePlan.build(source)
+
+    @property
+    def engine(self) -> str:
+        return "direct" if self.plan is not None else "docxtpl"
+
+    def clone(self) -> DocxDocument:
+        # копируются только части, которые меняет рендер; стили, тема, шрифты и картинки общие
+        return copy.deepcopy(self._prototype, {id(part): part for part in self._shared})
+
+    def new_document(self) -> DocxTemplate:
+        # без чтения с диска, разбора XML, патча и компиляции Jinja
+        return _PreparedDocxTemplate(self)
+
+    def renders_directly(self, payload: dict[str, str]) -> bool:
+        return self.plan is not None and self.plan.accepts(payload)
+
+    def render_bytes(self, payload: dict[str, str]) -> bytes:
+        if self.renders_directly(payload):
+            self._stats.direct += 1
+            return self.plan.render(payload)
+
+        document = self.new_document()
+        document.render(payload, jinja_env=self.environment)
+        buffer = BytesIO()
+        document.save(buffer)
+        self._stats.docxtpl += 1
+        return buffer.getvalue()
+
+    def patch(self, src_xml: str, patcher: Callable[[str], str]) -> str:
+        patched = self._patched.get(src_xml)
+        if patched is None:
+            patched = patcher(src_xml)
+            self._patched[src_xml] = patched
+        return patched
+
+
+def _read_only_parts(document: DocxDocument) -> list[Part]:
+    package = document.part.package
+    # рендер docxtpl переписывает тело документа, свойства и сноски
+    mutable: set[Part] = {document.part, package._core_properties_part}
+    parts = list(package.iter_parts())
+    mutable.update(part for part in parts if part.content_type.endswith("footnotes+xml"))
+    return [part for part in parts if part not in mutable and not _reaches(part, mutable)]
+
+
+def _reaches(part: Part, targets: set[Part]) -> bool:
+    seen: set[Part] = set()
+    pending = [part]
+    while pending:
+        for rel in pending.pop().rels.values():
+            if rel.is_external or rel.target_part in seen:
+                continue
+            if rel.target_part in targets:
+                return True
+            seen.add(rel.target_part)
+            pending.append(rel.target_part)
+    return False
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    template: CompiledTemplate
+
+
+class TemplateCache:
+    def __init__(self) -> None:
+        self._entries: dict[Path, _Entry] = {}
+        self._lock = threading.Lock()
+        self.stats = TemplateCacheStats()
+
+    def get(self, path: Path) -> CompiledTemplate:
+        stat = path.stat()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                self.stats.hits += 1
+                return entry.template
+
+            source = path.read_bytes()
+            self.stats.loads += 1
+            # mtime мог смениться без правки содержимого (копирование, touch) — сверяем хеш
+            if entry and entry.template.digest == hashlib.sha256(source).hexdigest():
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                return entry.template
+
+            template = CompiledTemplate(path, source, self.stats)
+            self._entries[path] = _Entry(stat.st_mtime_ns, stat.st_size, template)
+            return template
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
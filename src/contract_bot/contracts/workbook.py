@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import csv
+from functools import lru_cache
+from importlib.util import find_spec
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils.cell import coordinate_to_tuple
+from xlrd import XL_CELL_BLANK, XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_EMPTY, XL_CELL_ERROR, XL_CELL_NUMBER
+from xlrd.xldate import xldate_as_datetime
+
+CSV_SUFFIX = ".csv"
+CSV_ENCODING = "utf-8-sig"
+CALAMINE_MODULE = "python_calamine"
+CALAMINE_SUFFIXES = frozenset({".xlsx", ".xlsm", ".xls", ".xlsb", ".ods"})
+
+
+@lru_cache(maxsize=None)
+def module_available(module: str) -> bool:
+    return find_spec(module) is not None
+
+
+class WorkbookSession:
+    def __init__(self, path: Path) -> None:
+        if not path.exists():
+            raise FileNotFoundError(f"Excel file not found: {path}")
+        self.path = path
+        self._excel: pd.ExcelFile | None = None
+        self._calamine: Any = None
+        # имя способа чтения, которым парсер разобрал файл в этой сессии
+        self.reader: str | None = None
+
+    def __enter__(self) -> "WorkbookSession":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def excel(self) -> pd.ExcelFile:
+        # файл распаковывается один раз при первом обращении и переиспользуется
+        if self._excel is None:
+            self._excel = pd.ExcelFile(self.path)
+        return self._excel
+
+    @property
+    def calamine(self) -> Any:
+        # с python-calamine файл декодируется им один раз: и названия листов, и ячейки настроек, и строки
+        if self._calamine is None and self.uses_calamine:
+            from python_calamine import CalamineWorkbook
+
+            self._calamine = CalamineWorkbook.from_path(str(self.path))
+        return self._calamine
+
+    @property
+    def uses_calamine(self) -> bool:
+        return self.path.suffix.lower() in CALAMINE_SUFFIXES and module_available(CALAMINE_MODULE)
+
+    @property
+    def is_csv(self) -> bool:
+        return self.path.suffix.lower() == CSV_SUFFIX
+
+    @property
+    def sheet_names(self) -> list[str]:
+        if self.is_csv:
+            return []
+        if self.uses_calamine:
+            return [str(name) for name in self.calamine.sheet_names]
+        return [str(name) for name in self.excel.sheet_names]
+
+    @property
+    def is_openpyxl(self) -> bool:
+        return not self.is_csv and isinstance(self.excel.book, Workbook)
+
+    @property
+    def is_xlrd(self) -> bool:
+        return not self.is_csv and hasattr(self.excel.book, "sheet_by_name")
+
+    def read_frame(self, sheet_name: int | str, header: int) -> pd.DataFrame:
+        return self.excel.parse(sheet_name=sheet_name, header=header)
+
+    def iter_rows(self, sheet_name: str | None, min_row: int) -> Iterator[tuple]:
+        if self.is_csv:
+            return self._iter_csv_rows(min_row)
+        if self.is_xlrd:
+            return self._iter_xlrd_rows(sheet_name, min_row)
+        if not self.is_openpyxl:
+            raise TypeError(f"Row streaming is not supported for {self.path.suffix} files")
+        book = self.excel.book
+        sheet = book[sheet_name] if sheet_name else book.worksheets[0]
+        return sheet.iter_rows(min_row=min_row, values_only=True)
+
+    def cell_value(self, sheet_name: str | None, reference: str) -> object:
+        if self.is_csv:
+            row, column = coordinate_to_tuple(reference)
+            values = next(self._iter_csv_rows(row), ())
+            value = values[column - 1] if column <= len(values) else None
+            return value or None
+
+        if self.uses_calamine:
+            row, column = coordinate_to_tuple(reference)
+            names = self.calamine.sheet_names
+            sheet = self.calamine.get_sheet_by_name(sheet_name or names[0])
+            rows = sheet.to_python(skip_empty_area=False, nrows=row)
+            values = rows[row - 1] if row <= len(rows) else ()
+            value = values[column - 1] if column <= len(values) else None
+            return None if value == "" else value
+
+        book = self.excel.book
+        if self.is_openpyxl:
+            sheet = book[sheet_name] if sheet_name else book.active
+            return sheet[reference].value
+
+        row, column = coordinate_to_tuple(reference)
+        sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+        if row > sheet.nrows or column > sheet.ncols:
+            return None
+        value = sheet.cell_value(row - 1, column - 1)
+        return None if value == "" else value
+
+    def _iter_csv_rows(self, min_row: int) -> Iterator[tuple]:
+        with self.path.open(encoding=CSV_ENCODING, newline="") as stream:
+            for row in islice(csv.reader(stream), min_row - 1, None):
+                yield tuple(row)
+
+    def _iter_xlrd_rows(self, sheet_name: str | None, min_row: int) -> Iterator[tuple]:
+        book = self.excel.book
+        sheet = book.sheet_by_name(sheet_name) if sheet_name else book.sheet_by_index(0)
+        for index in range(min_row - 1, sheet.nrows):
+            yield tuple(_xlrd_value(cell, book.datemode) for cell in sheet.row(index))
+
+    def close(self) -> None:
+        if self._calamine is not None:
+            close = getattr(self._calamine, "close", None)
+            if close is not None:
+                close()
+            self._calamine = None
+        if self._excel is not None:
+            self._excel.close()
+            self._excel = None
+
+
+def _xlrd_value(cell, datemode: int) -> object:
+    # те же преобразования, что делает pandas при чтении .xls
+    if cell.ctype in (XL_CELL_EMPTY, XL_CELL_BLANK, XL_CELL_ERROR):
+        return None
+    if cell.ctype == XL_CELL_DATE:
+        try:
+            return xldate_as_datetime(cell.value, datemode)
+        except (ValueError, OverflowError):
+            return cell.value
+    if cell.ctype == XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    if cell.ctype == XL_CELL_NUMBER and float(cell.value).is_integer():
+        return int(cell.value)
+    return cell.value
@@ -1,39 +1,75 @@
 from __future__ import annotations
 
 import asyncio
-from logging import Logger
+from pathlib import Path
 
 from aiogram.types import BotCommand
 
 from contract_bot.bot import build_bot
 from contract_bot.config import AppConfig
+from contract_bot.contracts.cache import ParseCache
 from contract_bot.contracts.documents import DocumentGenerator
+from contract_bot.contracts.parser import DocumentType, available_backends, iter_contracts
 from contract_bot.integrations.yadisk import YandexDiskClient
 from contract_bot.logging_setup import setup_logging
-from contract_bot.service.reminder import ReminderService
+from contract_bot.service.delivery import SendScheduler
+from contract_bot.service.file_ids import TelegramFileCache
+from contract_bot.service.outbox import Outbox
+from contract_bot.service.reminder import ReminderService, build_notification_key
+from contract_bot.service.retention import GeneratedRetention
 from contract_bot.service.scheduler import Scheduler
 from contract_bot.service.sheet_sync import SheetSyncService
 from contract_bot.storage import create_file_repository, create_state_store
+from contract_bot.storage.buffered_state_store import BufferedStateStore
+from contract_bot.storage.sqlite_state_store import SqliteStateStore
 
 
 async def _run_async() -> None:
     config = AppConfig.load()
     logger = setup_logging(config.logging.level)
+    logger.info("Доступные способы чтения таблиц: %s", ", ".join(available_backends()))
 
-    state_store = create_state_store(config.paths.state_file)
     file_repo = create_file_repository(config.paths.files_dir)
-    document_generator = DocumentGenerator(config.paths.templates_dir, config.paths.generated_dir)
+    if config.state.backend == "sqlite":
+        state_store = SqliteStateStore(config.paths.state_db_file, logger)
+        if not state_store.migrated and config.paths.state_file.exists():
+            # при первом запуске на SQLite чаты и отметки переносятся из state.json
+            state_store.migrate_from(
+                create_state_store(config.paths.state_file),
+                config.paths.state_file,
+                _known_notification_keys(file_repo.get_latest()),
+            )
+    else:
+        state_store = create_state_store(config.paths.state_file)
+    # буфер окупается только там, где пачка пишется одной транзакцией: JSON-хранилище всё равно
+    # переписывало бы state.json на каждую отметку при сбросе
+    if config.state.flush_seconds > 0 and hasattr(state_store, "mark_notifications"):
+        state_store = BufferedStateStore(state_store, logger)
+    elif config.state.flush_seconds > 0:
+        logger.info(
+            "STATE_FLUSH_SECONDS действует только с STATE_BACKEND=sqlite: state.json пишется на каждую отметку"
+        )
+    document_generator = DocumentGenerator(
+        config.paths.templates_dir,
+        config.paths.generated_dir,
+        archive=config.cache.archive_documents,
+    )
     yadisk_client = YandexDiskClient(config.integrations.yadisk_token)
+    parse_cache = None
+    if config.cache.parse_cache_entries > 0:
+        parse_cache = ParseCache(config.paths.parse_cache_dir, config.cache.parse_cache_entries)
 
     sheet_sync = SheetSyncService(
         config=config,
         file_repository=file_repo,
         state_store=state_store,
         logger=logger,
+        parse_cache=parse_cache,
     )
 
-    bot, dispatcher, deps = build_bot(config, state_store, file_repo)
+    bot, dispatcher, deps = build_bot(config, state_store, file_repo, logger)
 
+    file_ids = TelegramFileCache(config.paths.file_ids_file)
     reminder_service = ReminderService(
         config=config,
         bot=bot,
@@ -42,6 +78,18 @@ async def _run_async() -> None:
         state_store=state_store,
         logger=logger,
         yadisk_client=yadisk_client,
+        parse_cache=parse_cache,
+        file_ids=file_ids,
+        sender=SendScheduler(
+            logger,
+            concurrency=config.delivery.concurrency,
+            global_rate=config.delivery.rate_per_second,
+        ),
+        outbox=Outbox(
+            config.paths.outbox_dir,
+            base_delay=config.delivery.retry_seconds,
+            max_attempts=config.delivery.max_attempts,
+        ),
     )
     sheet_sync.set_reminder_service(reminder_service)
     deps.reminder_service = reminder_service
@@ -59,11 +107,21 @@ async def _run_async() -> None:
         ]
     )
 
+    retention = GeneratedRetention(
+        config.paths.generated_dir,
+        logger,
+        max_bytes=config.cache.generated_max_mb * 1024 * 1024,
+        max_age_days=config.cache.generated_max_age_days,
+        protected_keys=reminder_service.pending_documents,
+    )
+
     scheduler = Scheduler(
         config=config,
         reminder_service=reminder_service,
         sheet_sync=sheet_sync,
         logger=logger,
+        retention=retention,
+        state_store=state_store if isinstance(state_store, (BufferedStateStore, SqliteStateStore)) else None,
     )
     scheduler.start()
 
@@ -71,6 +129,23 @@ async def _run_async() -> None:
         await dispatcher.start_polling(bot)
     finally:
         scheduler.shutdown()
+        document_generator.close()
+        file_ids.flush()
+        # остаток отложенных отметок записывается до выхода
+        if isinstance(state_store, (BufferedStateStore, SqliteStateStore)):
+            state_store.close()
+
+
+def _known_notification_keys(latest: str | Path | None) -> list[str]:
+    # StateStore умеет только проверять ключ, поэтому кандидаты строятся по строкам последней таблицы
+    if not latest:
+        return []
+    return [
+        build_notification_key(record, doc_type)
+        for record in iter_contracts(Path(latest))
+        if record.end_date is not None
+        for doc_type in DocumentType
+    ]
 
 
 def main() -> None:
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from logging import Logger
+from typing import Awaitable, Callable, TypeVar
+
+from aiogram.exceptions import TelegramRetryAfter
+
+T = TypeVar("T")
+
+# лимиты Telegram: около 30 сообщений в секунду на бота, 1 в секунду в личный чат, 20 в минуту в группу
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_RATE = 1.0
+GROUP_CHAT_RATE = 20 / 60
+DEFAULT_CONCURRENCY = 8
+MAX_RETRY_AFTER_ATTEMPTS = 5
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self._rate = rate
+        self._capacity = max(capacity, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # ожидающие обслуживаются по очереди под замком, так что порядок отправки сохраняется
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        # после RetryAfter бакет пуст до конца паузы, без накопленного за это время запаса
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+        self._tokens = 0.0
+        self._updated = until
+
+
+class SendScheduler:
+    def __init__(
+        self,
+        logger: Logger,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        global_rate: float = GLOBAL_RATE,
+    ) -> None:
+        self._logger = logger
+        self._concurrency = max(concurrency, 1)
+        self._global_rate = global_rate
+        self._global: TokenBucket | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._chats: dict[int, TokenBucket] = {}
+
+    async def send(self, chat_id: int, call: Callable[[], Awaitable[T]]) -> T:
+        semaphore, global_bucket = self._limits()
+        bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            # сначала лимит чата: пока один чат ждёт своей очереди, общий лимит достаётся другим
+            await bucket.acquire()
+            await global_bucket.acquire()
+            async with semaphore:
+                try:
+                    return await call()
+                except TelegramRetryAfter as exc:
+                    attempt += 1
+                    if attempt >= MAX_RETRY_AFTER_ATTEMPTS:
+                        raise
+                    self._logger.warning(
+                        "Telegram просит подождать %s с перед отправкой в чат %s",
+                        exc.retry_after,
+                        chat_id,
+                    )
+                    bucket.pause(exc.retry_after)
+
+    def _limits(self) -> tuple[asyncio.Semaphore, TokenBucket]:
+        # примитивы asyncio создаются в цикле событий, где идёт рассылка
+        if self._semaphore is None or self._global is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            self._global = TokenBucket(self._global_rate, capacity=self._global_rate)
+        return self._semaphore, self._global
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # отрицательные chat_id — группы и каналы, у них лимит строже
+            rate = GROUP_CHAT_RATE if chat_id < 0 else PRIVATE_CHAT_RATE
+            bucket = TokenBucket(rate, capacity=1.0)
+            self._chats[chat_id] = bucket
+        return bucket
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from contract_bot.utils.files import atomic_write_text
+
+FILE_IDS_VERSION = 1
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class TelegramFileCache:
+    # file_id выдаётся Telegram после первой загрузки и годится для повторной отправки тем же ботом
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._path = path
+        self._max_entries = max(max_entries, 1)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, str] = OrderedDict(self._load())
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def get(self, digest: str) -> str | None:
+        # вытесняется давно не отправлявшийся документ, поэтому попадание освежает запись;
+        # файл ради одного порядка не переписывается — он попадёт на диск со следующим изменением
+        with self._lock:
+            file_id = self._entries.get(digest)
+            if file_id is not None:
+                self._entries.move_to_end(digest)
+            return file_id
+
+    def remember(self, digest: str, file_id: str) -> None:
+        # изменения пишутся на диск в flush после рассылки: потерянный file_id стоит лишь повторной загрузки
+        with self._lock:
+            if self._entries.get(digest) != file_id:
+                self._entries[digest] = file_id
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def forget(self, digest: str) -> None:
+        with self._lock:
+            if self._entries.pop(digest, None) is not None:
+                self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _load(self) -> dict[str, str]:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if payload.get("version") != FILE_IDS_VERSION:
+            return {}
+        return dict(payload.get("files", {}))
+
+    def _save(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(
+            self._path,
+            json.dumps({"version": FILE_IDS_VERSION, "files": self._entries}, ensure_ascii=False),
+        )
+        self._dirty = False
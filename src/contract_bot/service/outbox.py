@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable
+
+from contract_bot.contracts.documents import RenderedDocument
+from contract_bot.utils.files import atomic_write_bytes, atomic_write_text
+
+OUTBOX_VERSION = 1
+OUTBOX_FILE = "outbox.json"
+DEFAULT_BASE_DELAY = 30.0
+DEFAULT_MAX_DELAY = 3600.0
+DEFAULT_MAX_ATTEMPTS = 10
+
+
+@dataclass
+class OutboxEntry:
+    chat_id: int
+    notification_key: str
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    # документ и подпись сохраняются для фонового повтора
+    document_key: str | None = None
+    filename: str | None = None
+    digest: str | None = None
+    caption: str | None = None
+    last_error: str | None = None
+    # попытки исчерпаны или Telegram отказал окончательно: запись больше не повторяется и не уходит
+    # с обычной проверкой, пока её не отправят принудительно
+    dead: bool = False
+
+    @property
+    def id(self) -> str:
+        return _entry_id(self.chat_id, self.notification_key)
+
+    @property
+    def deferred(self) -> bool:
+        return self.digest is not None and not self.dead
+
+    @property
+    def held(self) -> bool:
+        return self.deferred or self.dead
+
+
+class Outbox:
+    # журнал неудачных отправок: отметка в хранилище состояния — источник правды о доставке,
+    # сюда попадает то, что ждёт повтора, и то, что повторять больше не нужно. Запланированное не пишется:
+    # после падения процесса следующая проверка и так соберёт всё, что не отмечено отправленным
+    def __init__(
+        self,
+        directory: Path,
+        base_delay: float = DEFAULT_BASE_DELAY,
+        max_delay: float = DEFAULT_MAX_DELAY,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> None:
+        self._directory = directory
+        self._path = directory / OUTBOX_FILE
+        self._base_delay = max(base_delay, 1.0)
+        self._max_delay = max(max_delay, self._base_delay)
+        self._max_attempts = max(max_attempts, 1)
+        self._lock = threading.Lock()
+        self._entries: dict[str, OutboxEntry] = self._load()
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def release(self, items: Iterable[tuple[int, str]]) -> None:
+        # принудительная отправка забирает отложенные и исчерпанные записи: счёт попыток начинается заново
+        with self._lock:
+            for chat_id, notification_key in items:
+                if self._entries.pop(_entry_id(chat_id, notification_key), None) is not None:
+                    self._dirty = True
+
+    def prune(self, live_keys: Iterable[str]) -> int:
+        # уведомление, ушедшее за горизонт напоминаний (контракт закончился, строка изменилась),
+        # больше никто не отправит: запись и её документ удаляются при flush
+        live_keys = set(live_keys)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry.notification_key not in live_keys]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._dirty = True
+        return len(stale)
+
+    def is_deferred(self, chat_id: int, notification_key: str) -> bool:
+        entry = self._entries.get(_entry_id(chat_id, notification_key))
+        return entry is not None and entry.deferred
+
+    def is_dead(self, chat_id: int, notification_key: str) -> bool:
+        entry = self._entries.get(_entry_id(chat_id, notification_key))
+        return entry is not None and entry.dead
+
+    def complete(self, chat_id: int, notification_key: str) -> None:
+        # сохраняется при flush: если процесс упадёт раньше, запись отсеется по отметке в хранилище состояния
+        with self._lock:
+            if self._entries.pop(_entry_id(chat_id, notification_key), None) is not None:
+                self._dirty = True
+
+    def defer(
+        self,
+        chat_id: int,
+        notification_key: str,
+        document: RenderedDocument,
+        caption: str,
+        error: BaseException,
+        permanent: bool = False,
+    ) -> OutboxEntry:
+        with self._lock:
+            entry_id = _entry_id(chat_id, notification_key)
+            entry = self._entries.get(entry_id) or OutboxEntry(chat_id, notification_key)
+            entry.attempts += 1
+            entry.last_error = str(error) or type(error).__name__
+            self._entries[entry_id] = entry
+            if permanent or entry.attempts >= self._max_attempts:
+                # запись остаётся в журнале, иначе обычная проверка отправляла бы её снова при каждом запуске;
+                # документ не хранится — принудительная отправка соберёт его заново
+                entry.dead = True
+                entry.next_attempt_at = 0.0
+                entry.document_key = entry.filename = entry.digest = entry.caption = None
+                self._save()
+                return entry
+
+            delay = min(self._base_delay * 2 ** (entry.attempts - 1), self._max_delay)
+            entry.next_attempt_at = time.time() + delay
+            entry.document_key = document.key
+            entry.filename = document.filename
+            entry.digest = document.digest
+            entry.caption = caption
+            self._store_document(document)
+            self._save()
+            return entry
+
+    def due(self, now: float | None = None) -> list[OutboxEntry]:
+        now = time.time() if now is None else now
+        with self._lock:
+            return [entry for entry in self._entries.values() if entry.deferred and entry.next_attempt_at <= now]
+
+    def document(self, entry: OutboxEntry) -> RenderedDocument | None:
+        if not entry.deferred or entry.document_key is None or entry.filename is None:
+            return None
+        try:
+            content = self._document_path(entry.digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        return RenderedDocument.build(entry.document_key, entry.filename, content)
+
+    def drop(self, entry: OutboxEntry) -> None:
+        with self._lock:
+            if self._entries.pop(entry.id, None) is not None:
+                self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save()
+            # файлы документов, на которые больше не ссылается ни одна запись
+            referenced = {entry.digest for entry in self._entries.values() if entry.deferred}
+            for path in self._directory.glob("*.docx"):
+                if path.stem not in referenced:
+                    path.unlink(missing_ok=True)
+
+    def _store_document(self, document: RenderedDocument) -> None:
+        path = self._document_path(document.digest)
+        if path.exists():
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(path, document.content)
+
+    def _document_path(self, digest: str | None) -> Path:
+        return self._directory / f"{digest}.docx"
+
+    def _load(self) -> dict[str, OutboxEntry]:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if payload.get("version") != OUTBOX_VERSION:
+            return {}
+        entries = {}
+        for item in payload.get("entries", []):
+            try:
+                entry = OutboxEntry(**item)
+            except TypeError:
+                continue
+            # запланированные записи прежних версий ничего не добавляют к отметкам о доставке
+            if entry.held:
+                entries[entry.id] = entry
+        return entries
+
+    def _save(self) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(
+            self._path,
+            json.dumps(
+                {"version": OUTBOX_VERSION, "entries": [asdict(entry) for entry in self._entries.values()]},
+                ensure_ascii=False,
+            ),
+        )
+        self._dirty = False
+
+
+def _entry_id(chat_id: int, notification_key: str) -> str:
+    return f"{chat_id}|{notification_key}"
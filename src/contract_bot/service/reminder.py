@@ -1,18 +1,31 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from collections import Counter
+from concurrent.futures import Future
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from logging import Logger
 from pathlib import Path
+from typing import Awaitable, Iterator
 
 from aiogram import Bot
-from aiogram.types import FSInputFile
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.types import BufferedInputFile
 from zoneinfo import ZoneInfo
 
 from contract_bot.config import AppConfig
-from contract_bot.contracts.documents import DocumentContext, DocumentGenerator
-from contract_bot.contracts.parser import ContractRecord, DocumentType, parse_contracts
+from contract_bot.contracts.cache import ParseCache
+from contract_bot.contracts.dates import coerce_date
+from contract_bot.contracts.documents import DocumentGenerator, RenderedDocument
+from contract_bot.contracts.index import ContractIndex
+from contract_bot.contracts.parser import ContractRecord, DocumentType, iter_contracts
+from contract_bot.contracts.table import ContractTable
+from contract_bot.service.delivery import SendScheduler
+from contract_bot.service.file_ids import TelegramFileCache
+from contract_bot.service.outbox import Outbox
 from contract_bot.storage.file_repository import FileRepository
 from contract_bot.storage.state_store import StateStore
 from contract_bot.integrations.yadisk import YandexDiskClient
@@ -23,6 +36,30 @@ class ReminderResult:
     processed: int = 0
     notified: int = 0
     skipped: int = 0
+    deferred: int = 0
+
+
+@dataclass
+class _PendingNotice:
+    record: ContractRecord
+    doc_type: DocumentType
+    notification_key: str
+    recipients: list[int]
+
+
+def build_notification_key(record: ContractRecord, doc_type: DocumentType) -> str:
+    return f"{record.employee}|{record.end_date.isoformat()}|{doc_type.value}"
+
+
+async def _wait_document(
+    notice: _PendingNotice,
+    future: Future[RenderedDocument],
+) -> tuple[_PendingNotice, RenderedDocument | Exception]:
+    # ошибка рендера возвращается вместе с уведомлением, чтобы не прерывать разбор остальных документов
+    try:
+        return notice, await asyncio.wrap_future(future)
+    except Exception as exc:  # noqa: BLE001
+        return notice, exc
 
 
 class ReminderService:
@@ -35,6 +72,10 @@ class ReminderService:
         state_store: StateStore,
         logger: Logger,
         yadisk_client: YandexDiskClient | None = None,
+        parse_cache: ParseCache | None = None,
+        file_ids: TelegramFileCache | None = None,
+        sender: SendScheduler | None = None,
+        outbox: Outbox | None = None,
     ) -> None:
         self._config = config
         self._bot = bot
@@ -44,6 +85,13 @@ class ReminderService:
         self._logger = logger
         self._timezone = ZoneInfo(config.scheduler.timezone)
         self._yadisk = yadisk_client
+        self._parse_cache = parse_cache
+        self._file_ids = file_ids
+        self._index: ContractIndex | None = None
+        # ключи документов, которые сейчас отправляются: чистка архива их не трогает
+        self._in_flight: Counter[str] = Counter()
+        self._sender = sender or SendScheduler(logger)
+        self._outbox = outbox
         self._reminder_days = config.scheduler.reminder_days
 
     @property
@@ -63,21 +111,20 @@ class ReminderService:
             self._logger.info("Нет загруженного Excel. Напоминания пропущены.")
             return ReminderResult()
 
-        records = await asyncio.to_thread(parse_contracts, Path(latest))
+        index = await asyncio.to_thread(self._load_index, Path(latest))
         now = datetime.now(tz=self._timezone).date()
         reminder_days = self._reminder_days
         chats = self._state_store.get_chats()
-        result = ReminderResult(processed=len(records))
+        result = ReminderResult(processed=len(index))
 
         if not chats:
             self._logger.info("Нет зарегистрированных чатов для отправки уведомлений.")
             return result
 
-        for record in records:
-            if not record.end_date:
-                result.skipped += 1
-                continue
-
+        result.skipped += index.undated + index.count_before(now)
+        pending: list[_PendingNotice] = []
+        horizon: set[str] = set()
+        for record in index.upcoming(now, reminder_days):
             mark = (record.readiness_mark or "").strip().upper()
             # временно игнорируем отметки, чтобы проверка всегда шла
             # if not force and mark in {"П", "Н", "Д", "И"}:
@@ -89,56 +136,266 @@ class ReminderService:
             #     result.skipped += 1
             #     continue
 
-            days_left = (record.end_date - now).days
-            if days_left < 0:
-                result.skipped += 1
-                continue
-            if days_left > reminder_days:
-                continue
-
             doc_type = record.decide_document()
             doc_types = [doc_type] if doc_type is not None else [DocumentType.EXTENSION, DocumentType.TERMINATION]
 
             for current_type in doc_types:
-                notification_key = f"{record.employee}|{record.end_date.isoformat()}|{current_type.value}"
+                notification_key = build_notification_key(record, current_type)
+                horizon.add(notification_key)
 
+                recipients = []
                 for chat in chats:
                     if not force and self._state_store.has_notification(chat.chat_id, notification_key):
                         self._logger.debug("Уведомление уже отправлялось для %s", notification_key)
                         continue
+                    # принудительный запуск забирает и отложенные, и исчерпавшие попытки уведомления
+                    if not force and self._outbox is not None:
+                        if self._outbox.is_deferred(chat.chat_id, notification_key):
+                            self._logger.debug("Уведомление %s ждёт повторной отправки", notification_key)
+                            continue
+                        if self._outbox.is_dead(chat.chat_id, notification_key):
+                            self._logger.debug(
+                                "Уведомление %s для чата %s больше не повторяется", notification_key, chat.chat_id
+                            )
+                            continue
+                    recipients.append(chat.chat_id)
+                if recipients:
+                    pending.append(_PendingNotice(record, current_type, notification_key, recipients))
+
+        if self._outbox is not None:
+            if force:
+                self._outbox.release(
+                    (chat_id, notice.notification_key) for notice in pending for chat_id in notice.recipients
+                )
+            pruned = self._outbox.prune(horizon)
+            if pruned:
+                self._logger.info("Из outbox удалены уведомления за горизонтом напоминаний: %s", pruned)
+            if not pending:
+                await asyncio.to_thread(self._outbox.flush)
 
-                    await self._send_notification(chat.chat_id, record, current_type, notification_key, days_left)
-                    result.notified += 1
+        if pending:
+            notified, deferred = await self._deliver(pending, now)
+            result.notified += notified
+            result.deferred += deferred
 
+        self._logger.debug("Шаблоны документов: %s", self._document_generator.template_cache.stats)
+        self._logger.debug("Документы: %s", self._document_generator.stats)
         return result
 
+    def pending_documents(self) -> set[str]:
+        return set(self._in_flight)
+
+    async def upcoming(self, days: int | None = None) -> list[ContractRecord]:
+        latest = self._file_repository.get_latest()
+        if not latest:
+            return []
+        index = await asyncio.to_thread(self._load_index, Path(latest))
+        now = datetime.now(tz=self._timezone).date()
+        return list(index.upcoming(now, self._reminder_days if days is None else days))
+
+    def _load_index(self, path: Path) -> ContractIndex:
+        if self._parse_cache is None:
+            return ContractIndex(ContractTable.from_records(iter_contracts(path)))
+
+        table = self._parse_cache.get_or_parse(path)
+        self._logger.info("Кеш разбора таблицы: %s", self._parse_cache.stats)
+        self._logger.debug("Разбор дат: %s", coerce_date.stats)
+        # кеш возвращает ту же таблицу для неизменённого файла, индекс можно не перестраивать
+        if self._index is None or self._index.source is not table:
+            self._index = ContractIndex(table)
+        return self._index
+
+    async def _deliver(self, pending: list[_PendingNotice], now: date) -> tuple[int, int]:
+        # все документы запуска собираются одной пачкой, отправка идёт по мере готовности;
+        # документ и подпись общие для всех чатов
+        futures = await asyncio.to_thread(
+            self._document_generator.submit_batch,
+            [(notice.record, notice.doc_type) for notice in pending],
+        )
+        sends: list[asyncio.Task[tuple[int, int]]] = []
+        render_errors: list[Exception] = []
+        try:
+            for ready in asyncio.as_completed(
+                [_wait_document(notice, future) for notice, future in zip(pending, futures)]
+            ):
+                notice, document = await ready
+                if isinstance(document, Exception):
+                    self._logger.error("Не удалось сформировать документ %s: %s", notice.notification_key, document)
+                    render_errors.append(document)
+                    continue
+                sends.append(asyncio.create_task(self._deliver_notice(notice, document, now)))
+        finally:
+            # одна неудачная отправка не отменяет остальные: ошибка поднимается, когда очередь разошлась
+            outcomes = await asyncio.gather(*sends, return_exceptions=True)
+            self._flush_state()
+            if self._outbox is not None:
+                await asyncio.to_thread(self._outbox.flush)
+            await self._flush_file_ids()
+
+        errors = render_errors + [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        for error in errors[1:]:
+            self._logger.error("Ошибка при отправке уведомления: %s", error)
+        if errors:
+            raise errors[0]
+        return sum(sent for sent, _ in outcomes), sum(deferred for _, deferred in outcomes)
+
+    async def _deliver_notice(
+        self,
+        notice: _PendingNotice,
+        document: RenderedDocument,
+        now: date,
+    ) -> tuple[int, int]:
+        record = notice.record
+        days_left = (record.end_date - now).days
+        with self._holding(document):
+            link = await self._upload_document(document)
+            caption = self._build_caption(record, days_left, notice.doc_type, link)
+
+            def send(chat_id: int) -> Awaitable[bool]:
+                return self._attempt(chat_id, document, caption, notice.notification_key)
+
+            # первый чат загружает файл, остальные получают его по file_id — поэтому первый отдельно
+            first, *rest = notice.recipients
+            delivered = [await send(first)]
+            outcomes = await asyncio.gather(*(send(chat_id) for chat_id in rest), return_exceptions=True)
+            errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+            if errors:
+                raise errors[0]
+            delivered.extend(outcomes)
+            sent = sum(1 for ok in delivered if ok)
+            return sent, len(delivered) - sent
+
+    async def retry_deferred(self) -> int:
+        # фоновый повтор отложенных отправок; уже отмеченное в хранилище состояния не отправляется повторно
+        if self._outbox is None:
+            return 0
+        due = self._outbox.due()
+        if not due:
+            return 0
+
+        attempts = []
+        for entry in due:
+            if self._state_store.has_notification(entry.chat_id, entry.notification_key):
+                self._outbox.drop(entry)
+                continue
+            document = self._outbox.document(entry)
+            if document is None or entry.caption is None:
+                # без сохранённого документа уведомление соберёт заново обычная проверка
+                self._outbox.drop(entry)
+                continue
+            attempts.append(self._retry_entry(entry.chat_id, entry.notification_key, document, entry.caption))
+
+        try:
+            outcomes = await asyncio.gather(*attempts)
+        finally:
+            self._flush_state()
+            await asyncio.to_thread(self._outbox.flush)
+            await self._flush_file_ids()
+        sent = sum(1 for ok in outcomes if ok)
+        if attempts:
+            self._logger.info("Повтор отложенных уведомлений: отправлено %s из %s", sent, len(attempts))
+        return sent
+
+    async def _retry_entry(self, chat_id: int, notification_key: str, document: RenderedDocument, caption: str) -> bool:
+        with self._holding(document):
+            return await self._attempt(chat_id, document, caption, notification_key)
+
+    def _flush_state(self) -> None:
+        # отметки об отправке должны лечь на диск раньше, чем из outbox уйдут их записи
+        flush = getattr(self._state_store, "flush", None)
+        if flush is not None:
+            flush()
+
+    async def _flush_file_ids(self) -> None:
+        # запись file_ids.json — в отдельном потоке, не на каждую отправку и не в цикле событий
+        if self._file_ids is not None:
+            await asyncio.to_thread(self._file_ids.flush)
+
+    @contextmanager
+    def _holding(self, document: RenderedDocument) -> Iterator[None]:
+        self._in_flight[document.key] += 1
+        try:
+            yield
+        finally:
+            self._in_flight[document.key] -= 1
+            if self._in_flight[document.key] <= 0:
+                del self._in_flight[document.key]
+
+    async def _attempt(self, chat_id: int, document: RenderedDocument, caption: str, notification_key: str) -> bool:
+        try:
+            await self._sender.send(
+                chat_id,
+                lambda: self._send_notification(chat_id, document, caption, notification_key),
+            )
+            return True
+        except Exception as exc:  # noqa: BLE001
+            if self._outbox is None:
+                raise
+            # бот заблокирован или запрос отклонён: повтор ничего не изменит
+            permanent = isinstance(exc, (TelegramForbiddenError, TelegramBadRequest))
+            entry = await asyncio.to_thread(
+                self._outbox.defer, chat_id, notification_key, document, caption, exc, permanent
+            )
+            if entry.dead:
+                self._logger.error(
+                    "Уведомление %s для чата %s не отправлено (%s), попыток=%s; повторов не будет, "
+                    "отправить заново можно через /run_force",
+                    notification_key,
+                    chat_id,
+                    exc,
+                    entry.attempts,
+                )
+            else:
+                self._logger.warning(
+                    "Уведомление %s для чата %s не отправлено (%s), попытка %s, повтор через %.0f с",
+                    notification_key,
+                    chat_id,
+                    exc,
+                    entry.attempts,
+                    max(entry.next_attempt_at - time.time(), 0),
+                )
+            return False
+
+    async def _upload_document(self, document: RenderedDocument) -> str | None:
+        if not (self._yadisk and self._yadisk.enabled):
+            return None
+        try:
+            # Яндекс.Диску нужен файл: документ пишется в архив только в этом случае
+            document_path = await asyncio.to_thread(self._document_generator.archive_path, document)
+            return await self._yadisk.upload(document_path)
+        except NotImplementedError:
+            self._logger.debug("Загрузка на Яндекс.Диск ещё не реализована")
+            return None
+
     async def _send_notification(
         self,
         chat_id: int,
-        record: ContractRecord,
-        doc_type: DocumentType,
+        document: RenderedDocument,
+        caption: str,
         notification_key: str,
-        days_left: int,
     ) -> None:
-        document_path = await asyncio.to_thread(
-            self._document_generator.render,
-            record,
-            DocumentContext(record=record),
-            doc_type,
-        )
-
-        link = None
-        if self._yadisk and self._yadisk.enabled:
+        # файл, который Telegram уже видел, отправляется по file_id без повторной загрузки
+        file_id = self._file_ids.get(document.digest) if self._file_ids is not None else None
+        if file_id:
             try:
-                link = await self._yadisk.upload(document_path)
-            except NotImplementedError:
-                self._logger.debug("Загрузка на Яндекс.Диск ещё не реализована")
+                await self._bot.send_document(chat_id=chat_id, document=file_id, caption=caption)
+            except TelegramBadRequest as exc:
+                self._logger.warning("file_id для %s не принят (%s), загружаю файл заново", document.filename, exc)
+                self._file_ids.forget(document.digest)
+                file_id = None
 
-        caption = self._build_caption(record, days_left, doc_type, link)
-        file = FSInputFile(document_path)
+        if not file_id:
+            message = await self._bot.send_document(
+                chat_id=chat_id,
+                document=BufferedInputFile(document.content, filename=document.filename),
+                caption=caption,
+            )
+            if self._file_ids is not None and getattr(message, "document", None):
+                self._file_ids.remember(document.digest, message.document.file_id)
 
-        await self._bot.send_document(chat_id=chat_id, document=file, caption=caption)
         self._state_store.mark_notification(chat_id, notification_key)
+        if self._outbox is not None:
+            self._outbox.complete(chat_id, notification_key)
         self._logger.info("Отправлено уведомление %s чату %s", notification_key, chat_id)
 
     def _build_caption(
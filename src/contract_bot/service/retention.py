@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from logging import Logger
+from pathlib import Path
+from typing import Callable, Iterable
+
+from contract_bot.contracts.documents import DOCUMENT_CACHE_DIR
+
+# недописанный временный файл старше часа остался от упавшего процесса
+STALE_TMP_SECONDS = 3600
+EMPTY_DIR_GRACE_SECONDS = 60
+
+
+@dataclass
+class RetentionStats:
+    scanned: int = 0
+    removed: int = 0
+    removed_bytes: int = 0
+    kept_bytes: int = 0
+    protected: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"файлов={self.scanned}, удалено={self.removed} ({self.removed_bytes} байт), "
+            f"осталось={self.kept_bytes} байт, защищено={self.protected}"
+        )
+
+
+@dataclass
+class _Candidate:
+    path: Path
+    size: int
+    mtime: float
+
+
+class GeneratedRetention:
+    # держит GENERATED_DIR в пределах объёма и возраста: первыми уходят давно не использованные файлы
+    def __init__(
+        self,
+        root: Path,
+        logger: Logger,
+        max_bytes: int = 0,
+        max_age_days: int = 0,
+        protected_keys: Callable[[], Iterable[str]] | None = None,
+    ) -> None:
+        self._root = root
+        self._logger = logger
+        self._max_bytes = max(max_bytes, 0)
+        self._max_age = max(max_age_days, 0) * 86400
+        self._protected_keys = protected_keys
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0 or self._max_age > 0
+
+    def sweep(self) -> RetentionStats:
+        with self._lock:
+            return self._sweep()
+
+    def _sweep(self) -> RetentionStats:
+        stats = RetentionStats()
+        now = time.time()
+        files = self._scan(now, stats)
+        stats.scanned = len(files)
+        total = sum(item.size for item in files)
+
+        # защищены только документы в отправке: по file_id Telegram отправляет без локального файла,
+        # а outbox держит копию отложенных документов у себя
+        keys = set(self._protected_keys()) if self._protected_keys else set()
+
+        # от самых старых к свежим: чтение из архива обновляет mtime, так что это порядок LRU
+        files.sort(key=lambda item: item.mtime)
+        for item in files:
+            expired = self._max_age > 0 and now - item.mtime > self._max_age
+            over_budget = self._max_bytes > 0 and total > self._max_bytes
+            if not (expired or over_budget):
+                break
+            if self._is_protected(item, keys):
+                stats.protected += 1
+                continue
+            try:
+                item.path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                self._logger.warning("Не удалось удалить %s: %s", item.path, exc)
+                continue
+            total -= item.size
+            stats.removed += 1
+            stats.removed_bytes += item.size
+
+        stats.kept_bytes = total
+        if self._max_bytes > 0 and total > self._max_bytes:
+            self._logger.warning(
+                "Каталог %s занимает %s байт при лимите %s: остальные файлы ещё нужны для отправки",
+                self._root,
+                total,
+                self._max_bytes,
+            )
+        self._remove_empty_dirs()
+        return stats
+
+    def _scan(self, now: float, stats: RetentionStats) -> list[_Candidate]:
+        files: list[_Candidate] = []
+        pending = [self._root]
+        while pending:
+            try:
+                entries = list(os.scandir(pending.pop()))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(Path(entry.path))
+                    continue
+                try:
+                    info = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".tmp"):
+                    # свежий .tmp ещё дописывается генератором документов
+                    if now - info.st_mtime > STALE_TMP_SECONDS:
+                        Path(entry.path).unlink(missing_ok=True)
+                        stats.removed += 1
+                        stats.removed_bytes += info.st_size
+                    continue
+                files.append(_Candidate(Path(entry.path), info.st_size, info.st_mtime))
+        return files
+
+    def _is_protected(self, item: _Candidate, keys: set[str]) -> bool:
+        # документы архива лежат в cache/<ключ>/; ключ отправляемого сейчас документа трогать нельзя
+        parent = item.path.parent
+        return parent.parent.name == DOCUMENT_CACHE_DIR and parent.name in keys
+
+    def _remove_empty_dirs(self) -> None:
+        # только давно не менявшиеся каталоги: в свежий генератор может как раз записывать документ
+        threshold = time.time() - EMPTY_DIR_GRACE_SECONDS
+        for current, _, filenames in os.walk(self._root, topdown=False):
+            path = Path(current)
+            if path == self._root or filenames:
+                continue
+            try:
+                if path.stat().st_mtime < threshold:
+                    path.rmdir()
+            except OSError:
+                pass
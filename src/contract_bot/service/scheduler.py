@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 from logging import Logger
 
@@ -10,12 +11,25 @@ from zoneinfo import ZoneInfo
 
 from contract_bot.config import AppConfig
 from contract_bot.service.reminder import ReminderService
+from contract_bot.service.retention import GeneratedRetention
 from contract_bot.service.sheet_sync import SheetSyncService
+from contract_bot.storage.buffered_state_store import BufferedStateStore
+from contract_bot.storage.sqlite_state_store import SqliteStateStore
 
 
 class Scheduler:
-    def __init__(self, config: AppConfig, reminder_service: ReminderService, sheet_sync: SheetSyncService, logger: Logger) -> None:
+    def __init__(
+        self,
+        config: AppConfig,
+        reminder_service: ReminderService,
+        sheet_sync: SheetSyncService,
+        logger: Logger,
+        retention: GeneratedRetention | None = None,
+        state_store: BufferedStateStore | SqliteStateStore | None = None,
+    ) -> None:
         self._config = config
+        self._retention = retention
+        self._state_store = state_store
         self._reminder_service = reminder_service
         self._sheet_sync = sheet_sync
         self._logger = logger
@@ -54,6 +68,42 @@ class Scheduler:
             next_run_time=datetime.now(self._timezone) + timedelta(hours=1),
         )
 
+        self._scheduler.add_job(
+            self._outbox_job,
+            trigger=IntervalTrigger(seconds=max(self._config.delivery.retry_seconds, 1), timezone=self._timezone),
+            id="outbox-retry",
+            replace_existing=True,
+        )
+
+        if isinstance(self._state_store, BufferedStateStore):
+            self._scheduler.add_job(
+                self._flush_state_job,
+                trigger=IntervalTrigger(seconds=self._config.state.flush_seconds, timezone=self._timezone),
+                id="state-flush",
+                replace_existing=True,
+            )
+
+        if self._state_store is not None and self._state_store.supports_compaction:
+            # просроченные отметки чистятся раз в сутки, ночью, когда рассылок нет
+            self._scheduler.add_job(
+                self._compaction_job,
+                trigger=CronTrigger(hour=3, minute=30, timezone=self._timezone),
+                id="state-compaction",
+                replace_existing=True,
+            )
+
+        if self._retention is not None and self._retention.enabled:
+            self._scheduler.add_job(
+                self._retention_job,
+                trigger=IntervalTrigger(
+                    minutes=max(self._config.cache.retention_interval_minutes, 1),
+                    timezone=self._timezone,
+                ),
+                id="generated-retention",
+                replace_existing=True,
+                next_run_time=datetime.now(self._timezone) + timedelta(minutes=1),
+            )
+
         self._scheduler.start()
         self._logger.info(
             "Планировщик запущен: ежедневная проверка в 09:00 + резервный запуск раз в час"
@@ -71,14 +121,49 @@ class Scheduler:
                 await self._sheet_sync.sync()
             result = await self._reminder_service.run()
             self._logger.info(
-                "Напоминания обработаны: всего=%s, отправлено=%s, пропущено=%s",
+                "Напоминания обработаны: всего=%s, отправлено=%s, пропущено=%s, отложено=%s",
                 result.processed,
                 result.notified,
                 result.skipped,
+                result.deferred,
             )
         except Exception as exc:  # noqa: BLE001
             self._logger.exception("Ошибка при выполнении напоминаний: %s", exc)
 
+    async def _flush_state_job(self) -> None:
+        try:
+            self._state_store.flush()
+        except Exception as exc:  # noqa: BLE001
+            self._logger.exception("Ошибка при записи состояния: %s", exc)
+
+    async def _compaction_job(self) -> None:
+        try:
+            today = datetime.now(self._timezone).date()
+            # DELETE и VACUUM по всей базе — в отдельном потоке, как и чистка каталога документов
+            result = await asyncio.to_thread(self._state_store.compact_notifications, today)
+            self._logger.info("Чистка отметок об отправке: %s", result)
+            for chat_id, removed in sorted(result.by_chat.items()):
+                self._logger.debug("Чат %s: удалено просроченных ключей %s", chat_id, removed)
+        except Exception as exc:  # noqa: BLE001
+            self._logger.exception("Ошибка при чистке отметок об отправке: %s", exc)
+
+    async def _outbox_job(self) -> None:
+        try:
+            await self._reminder_service.retry_deferred()
+        except Exception as exc:  # noqa: BLE001
+            self._logger.exception("Ошибка при повторе отложенных уведомлений: %s", exc)
+
+    async def _retention_job(self) -> None:
+        try:
+            # обход каталога и хеширование файлов — в отдельном потоке, чтобы не стопорить бота
+            stats = await asyncio.to_thread(self._retention.sweep)
+            if stats.removed:
+                self._logger.info("Чистка каталога документов: %s", stats)
+            else:
+                self._logger.debug("Чистка каталога документов: %s", stats)
+        except Exception as exc:  # noqa: BLE001
+            self._logger.exception("Ошибка при чистке каталога документов: %s", exc)
+
     def shutdown(self) -> None:
         if self._scheduler.running:
             self._scheduler.shutdown()
@@ -8,10 +8,14 @@ from pathlib import Path
 from typing import Optional
 
 import requests
-from openpyxl import load_workbook
 from zoneinfo import ZoneInfo
 
 from contract_bot.config import AppConfig
+from contract_bot.contracts.cache import ParseCache
+from contract_bot.contracts.diff import SnapshotStore
+from contract_bot.contracts.parser import parse_contracts
+from contract_bot.contracts.table import ContractTable
+from contract_bot.contracts.workbook import WorkbookSession
 from contract_bot.service.reminder import ReminderService
 from contract_bot.storage.file_repository import FileRepository
 from contract_bot.storage.state_store import StateStore
@@ -24,17 +28,20 @@ class SheetSyncService:
         file_repository: FileRepository,
         state_store: StateStore,
         logger: Logger,
+        parse_cache: ParseCache | None = None,
     ) -> None:
         self._config = config
         self._file_repository = file_repository
         self._state_store = state_store
         self._logger = logger
+        self._parse_cache = parse_cache
         self._timezone = ZoneInfo(config.scheduler.timezone)
         self._last_sync: Optional[datetime] = None
         self._interval = timedelta(minutes=config.integrations.sheet_sync_interval_minutes)
         self._tolerance = timedelta(seconds=5)
         self._reminder_service: Optional[ReminderService] = None
         self._current_reminder_days = config.scheduler.reminder_days
+        self._snapshots = SnapshotStore(config.paths.snapshot_file)
 
     def set_reminder_service(self, service: ReminderService) -> None:
         self._reminder_service = service
@@ -73,33 +80,32 @@ class SheetSyncService:
         gid = self._config.integrations.google_sheet_gid or "0"
         filename = self._config.integrations.google_sheet_filename
 
-        urls = [
-            f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx&id={sheet_id}",
-            f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx&gid={gid}",
-            f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}",
+        xlsx_urls = [
+            ("xlsx", f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx&id={sheet_id}"),
+            ("xlsx", f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=xlsx&gid={gid}"),
         ]
+        csv_urls = [
+            ("csv", f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"),
+        ]
+        if self._config.integrations.google_sheet_format == "csv":
+            urls = csv_urls + xlsx_urls
+        else:
+            urls = xlsx_urls + csv_urls
 
         last_error: Exception | None = None
-        for url in urls:
+        for export_format, url in urls:
             try:
                 response = requests.get(url, timeout=30)
                 response.raise_for_status()
 
-                content = response.content
-                path: Path
-                if url.endswith("format=csv&gid={gid}".format(gid=gid)):
-                    import io
-                    import pandas as pd
-
-                    df = pd.read_csv(io.BytesIO(content))
-                    buffer = io.BytesIO()
-                    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-                        df.to_excel(writer, index=False)
-                    content = buffer.getvalue()
-
-                path = self._file_repository.save_latest(content, filename)
-                self._state_store.set_last_upload_for_all(filename)
-                self._update_reminder_days(path)
+                # CSV сохраняется как есть: парсер читает его напрямую, без перекодирования в xlsx
+                target_name = filename
+                if export_format == "csv":
+                    target_name = Path(filename).with_suffix(".csv").name
+
+                path = self._file_repository.save_latest(response.content, target_name)
+                self._state_store.set_last_upload_for_all(target_name)
+                self._process_workbook(path)
                 self._logger.info("Google Sheet синхронизирован по адресу %s", url)
                 return
             except Exception as exc:  # noqa: BLE001
@@ -109,15 +115,34 @@ class SheetSyncService:
         if last_error:
             raise last_error
 
-    def _update_reminder_days(self, path: Path) -> None:
+    def _process_workbook(self, path: Path) -> None:
+        # одна распаковка файла на горизонт напоминаний, прогрев кеша разбора и сравнение строк
+        with WorkbookSession(path) as session:
+            self._update_reminder_days(session)
+            try:
+                if self._parse_cache is not None:
+                    table = self._parse_cache.get_or_parse(path, session=session)
+                else:
+                    table = ContractTable.from_records(parse_contracts(path, session=session))
+            except Exception as exc:  # noqa: BLE001
+                self._logger.warning("Не удалось разобрать таблицу после синхронизации: %s", exc)
+                return
+            if session.reader:
+                self._logger.info("Таблица %s прочитана через %s", path.name, session.reader)
+
+        # сравнение со снимком — только сводка для журнала: сбой здесь не повод скачивать таблицу заново
+        try:
+            diff = self._snapshots.update(table)
+        except Exception as exc:  # noqa: BLE001
+            self._logger.exception("Не удалось сравнить таблицу с прошлым снимком: %s", exc)
+            return
+        self._logger.info("Изменения в таблице: %s", diff)
+
+    def _update_reminder_days(self, session: WorkbookSession) -> None:
         sheet_name_target = self._config.integrations.google_sheet_name
         try:
-            wb = load_workbook(path, read_only=True, data_only=True)
-            try:
-                sheet = wb[sheet_name_target] if sheet_name_target in wb.sheetnames else wb.active
-                raw_value = sheet["G5"].value or sheet["F5"].value
-            finally:
-                wb.close()
+            sheet_name = sheet_name_target if sheet_name_target in session.sheet_names else None
+            raw_value = session.cell_value(sheet_name, "G5") or session.cell_value(sheet_name, "F5")
         except Exception as exc:  # noqa: BLE001
             self._logger.warning("Не удалось прочитать горизонт напоминаний: %s", exc)
             return
@@ -140,6 +165,10 @@ class SheetSyncService:
         text = str(raw).strip().lower()
         if not text:
             return None
+        # из CSV ячейка приходит строкой: «30» или «30.0» — это число дней, как и числовая ячейка Excel
+        if re.fullmatch(r"\d+(?:[.,]\d+)?", text):
+            value = int(float(text.replace(",", ".")))
+            return value if value > 0 else None
 
         months = 0
         days = 0
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import copy
+import threading
+from contextlib import nullcontext
+from datetime import date, datetime
+from logging import Logger
+from typing import Any
+
+
+class BufferedStateStore:
+    # отложенная запись поверх любого хранилища состояния: отметки и время загрузки копятся в памяти
+    # и уходят одной пачкой в конце запуска, по таймеру и при остановке бота
+    def __init__(self, inner: Any, logger: Logger) -> None:
+        self._inner = inner
+        self._logger = logger
+        self._lock = threading.RLock()
+        self._notifications: dict[tuple[int, str], None] = {}
+        self._last_upload: tuple[str, datetime] | None = None
+
+    @property
+    def inner(self) -> Any:
+        return self._inner
+
+    @property
+    def pending(self) -> int:
+        return len(self._notifications) + (self._last_upload is not None)
+
+    def register_chat(self, chat_id: int) -> None:
+        # регистрация чата редкая и должна пережить перезапуск сразу
+        with self._lock:
+            self._inner.register_chat(chat_id)
+
+    def get_chat(self, chat_id: int) -> Any:
+        with self._lock:
+            return self._overlay(self._inner.get_chat(chat_id))
+
+    def get_chats(self) -> list[Any]:
+        with self._lock:
+            return [self._overlay(chat) for chat in self._inner.get_chats()]
+
+    def has_notification(self, chat_id: int, notification_key: str) -> bool:
+        with self._lock:
+            if (chat_id, notification_key) in self._notifications:
+                return True
+            return self._inner.has_notification(chat_id, notification_key)
+
+    def mark_notification(self, chat_id: int, notification_key: str) -> None:
+        with self._lock:
+            self._notifications[(chat_id, notification_key)] = None
+
+    def set_last_upload_for_all(self, file_name: str) -> None:
+        with self._lock:
+            self._last_upload = (file_name, datetime.utcnow())
+
+    def flush(self) -> int:
+        with self._lock:
+            notifications = list(self._notifications)
+            last_upload = self._last_upload
+            if not notifications and last_upload is None:
+                return 0
+
+            # SQLite пишет всю пачку одной транзакцией; остальным хранилищам изменения передаются по одному
+            transaction = getattr(self._inner, "transaction", None)
+            with transaction() if transaction is not None else nullcontext():
+                mark_many = getattr(self._inner, "mark_notifications", None)
+                if mark_many is not None:
+                    mark_many(notifications)
+                else:
+                    for chat_id, notification_key in notifications:
+                        self._inner.mark_notification(chat_id, notification_key)
+                if last_upload is not None:
+                    self._inner.set_last_upload_for_all(last_upload[0])
+
+            self._notifications.clear()
+            self._last_upload = None
+            written = len(notifications) + (last_upload is not None)
+        self._logger.debug("Состояние записано: изменений=%s", written)
+        return written
+
+    @property
+    def supports_compaction(self) -> bool:
+        return getattr(self._inner, "supports_compaction", False)
+
+    def compact_notifications(self, today: date) -> Any:
+        # буфер сначала сбрасывается, чтобы просроченные отметки из него тоже попали под чистку;
+        # сама чистка идёт без замка буфера, отметки тем временем копятся как обычно
+        self.flush()
+        return self._inner.compact_notifications(today)
+
+    def close(self) -> None:
+        self.flush()
+        close = getattr(self._inner, "close", None)
+        if close is not None:
+            close()
+
+    def _overlay(self, chat: Any) -> Any:
+        if chat is None or self._last_upload is None:
+            return chat
+        chat = copy.copy(chat)
+        chat.last_file_name, chat.last_upload_at = self._last_upload
+        return chat
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from logging import Logger
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    chat_id INTEGER PRIMARY KEY,
+    last_upload_at TEXT,
+    last_file_name TEXT
+);
+CREATE TABLE IF NOT EXISTS notifications (
+    chat_id INTEGER NOT NULL,
+    notification_key TEXT NOT NULL,
+    sent_at TEXT NOT NULL,
+    PRIMARY KEY (chat_id, notification_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+MIGRATED_FROM = "migrated_from"
+NOTIFICATIONS_MIGRATED_FROM = "notifications_migrated_from"
+COMPACTION_BATCH = 1000
+
+
+@dataclass
+class ChatState:
+    chat_id: int
+    last_upload_at: datetime | None = None
+    last_file_name: str | None = None
+
+
+@dataclass
+class CompactionResult:
+    removed: int = 0
+    reclaimed_bytes: int = 0
+    by_chat: dict[int, int] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        return f"удалено ключей={self.removed}, освобождено={self.reclaimed_bytes} байт, чатов={len(self.by_chat)}"
+
+
+class SqliteStateStore:
+    # тот же интерфейс, что у StateStore, но отметки об отправке — строки с индексом по (chat_id, ключ),
+    # а не весь state.json, который переписывается на каждую отметку
+    def __init__(self, path: Path, logger: Logger) -> None:
+        self._path = path
+        self._logger = logger
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL: чтение не ждёт записи, а коммит без fsync на каждую отметку (synchronous=NORMAL)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._depth = 0
+
+    def register_chat(self, chat_id: int) -> None:
+        with self.transaction() as connection:
+            connection.execute("INSERT OR IGNORE INTO chats (chat_id) VALUES (?)", (chat_id,))
+
+    def get_chat(self, chat_id: int) -> ChatState | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT chat_id, last_upload_at, last_file_name FROM chats WHERE chat_id = ?",
+                (chat_id,),
+            ).fetchone()
+        return _chat_state(row) if row else None
+
+    def get_chats(self) -> list[ChatState]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT chat_id, last_upload_at, last_file_name FROM chats ORDER BY chat_id"
+            ).fetchall()
+        return [_chat_state(row) for row in rows]
+
+    def has_notification(self, chat_id: int, notification_key: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM notifications WHERE chat_id = ? AND notification_key = ?",
+                (chat_id, notification_key),
+            ).fetchone()
+        return row is not None
+
+    def mark_notification(self, chat_id: int, notification_key: str) -> None:
+        self.mark_notifications([(chat_id, notification_key)])
+
+    def mark_notifications(self, items: Iterable[tuple[int, str]]) -> None:
+        sent_at = datetime.utcnow().isoformat()
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO notifications (chat_id, notification_key, sent_at) VALUES (?, ?, ?)",
+                ((chat_id, key, sent_at) for chat_id, key in items),
+            )
+
+    def set_last_upload_for_all(self, file_name: str) -> None:
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE chats SET last_upload_at = ?, last_file_name = ?",
+                (datetime.utcnow().isoformat(), file_name),
+            )
+
+    @property
+    def supports_compaction(self) -> bool:
+        return True
+
+    def compact_notifications(self, today: date) -> CompactionResult:
+        # ключ «сотрудник|дата окончания|тип»: после даты окончания запись в выборку не попадёт,
+        # и такой ключ больше ни с чем не совпадёт
+        result = CompactionResult()
+        # чистка идёт через отдельное соединение и без замка хранилища: чтение в WAL её не ждёт,
+        # а запись бота ждёт не дольше одной короткой транзакции
+        connection = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        try:
+            rows = connection.execute("SELECT chat_id, notification_key FROM notifications").fetchall()
+            expired = [(chat_id, key) for chat_id, key in rows if _is_expired(key, today)]
+            if not expired:
+                return result
+
+            size_before = self._size()
+            for start in range(0, len(expired), COMPACTION_BATCH):
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    connection.executemany(
+                        "DELETE FROM notifications WHERE chat_id = ? AND notification_key = ?",
+                        expired[start : start + COMPACTION_BATCH],
+                    )
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                connection.execute("COMMIT")
+            self._vacuum(connection)
+            result.reclaimed_bytes = max(size_before - self._size(), 0)
+        finally:
+            connection.close()
+
+        result.removed = len(expired)
+        for chat_id, _ in expired:
+            result.by_chat[chat_id] = result.by_chat.get(chat_id, 0) + 1
+        return result
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        # вложенные вызовы попадают во внешнюю транзакцию: пачка отметок — один коммит
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._connection
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._connection.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self._connection.execute("COMMIT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _vacuum(self, connection: sqlite3.Connection) -> None:
+        # VACUUM переписывает базу без освободившихся страниц, checkpoint сбрасывает хвост WAL
+        try:
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.OperationalError as exc:
+            self._logger.warning("Не удалось сжать %s: %s", self._path, exc)
+
+    def _size(self) -> int:
+        total = 0
+        for path in (self._path, self._path.with_name(self._path.name + "-wal")):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    @property
+    def migrated(self) -> bool:
+        return self._meta(MIGRATED_FROM) is not None and self._meta(NOTIFICATIONS_MIGRATED_FROM) is not None
+
+    def migrate_from(self, legacy: Any, source: Path, keys: Iterable[str]) -> None:
+        # однократный перенос из state.json через сам StateStore: формат файла знает только он.
+        # Чаты переносятся сразу и безусловно, отметки — когда есть таблица, по которой строятся ключи
+        if self._meta(MIGRATED_FROM) is None:
+            chats = list(legacy.get_chats())
+            with self.transaction() as connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO chats (chat_id, last_upload_at, last_file_name) VALUES (?, ?, ?)",
+                    [
+                        (
+                            chat.chat_id,
+                            _iso(getattr(chat, "last_upload_at", None)),
+                            getattr(chat, "last_file_name", None),
+                        )
+                        for chat in chats
+                    ],
+                )
+                self._set_meta(connection, MIGRATED_FROM, str(source))
+            self._logger.info("Чаты перенесены из %s в %s: %s", source, self._path, len(chats))
+
+        if self._meta(NOTIFICATIONS_MIGRATED_FROM) is not None:
+            return
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            # без ключей проверять нечего, а отметка о переносе закрыла бы его навсегда
+            self._logger.warning(
+                "Нет загруженной таблицы: отметки об отправке из %s будут перенесены при следующем запуске",
+                source,
+            )
+            return
+
+        notifications = [
+            (chat.chat_id, key)
+            for chat in legacy.get_chats()
+            for key in keys
+            if legacy.has_notification(chat.chat_id, key)
+        ]
+        with self.transaction() as connection:
+            self.mark_notifications(notifications)
+            self._set_meta(connection, NOTIFICATIONS_MIGRATED_FROM, str(source))
+        self._logger.info(
+            "Отметки об отправке перенесены из %s: %s (проверено ключей=%s)",
+            source,
+            len(notifications),
+            len(keys),
+        )
+
+    def _meta(self, key: str) -> str | None:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(connection: sqlite3.Connection, key: str, value: str) -> None:
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _is_expired(notification_key: str, today: date) -> bool:
+    # имя сотрудника может содержать «|», поэтому дата и тип берутся с конца
+    parts = notification_key.rsplit("|", 2)
+    if len(parts) != 3:
+        return False
+    try:
+        return date.fromisoformat(parts[1]) < today
+    except ValueError:
+        return False
+
+
+def _chat_state(row: tuple[int, str | None, str | None]) -> ChatState:
+    return ChatState(chat_id=row[0], last_upload_at=_parse_datetime(row[1]), last_file_name=row[2])
+
+
+def _parse_datetime(value: Any) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
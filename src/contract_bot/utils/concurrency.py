@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def available_cpus() -> int:
+    # ядра, к которым процесс привязан, и квота CPU контейнера: на большом хосте
+    # affinity видит все ядра, а квота cgroup может разрешать лишь пару
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, quota)
+    return max(cpus, 1)
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    # spawn вместо fork: родительский процесс держит потоки asyncio и планировщика
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _cgroup_cpu_quota() -> int | None:
+    # cgroup v2: «<квота> <период>» или «max <период>»; cgroup v1: quota -1 — без ограничения
+    try:
+        quota, period = (CGROUP_ROOT / "cpu.max").read_text().split()[:2]
+        if quota == "max":
+            return None
+        return max(math.ceil(int(quota) / int(period)), 1)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int((CGROUP_ROOT / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((CGROUP_ROOT / "cpu" / "cpu.cfs_period_us").read_text())
+    except (OSError, ValueError):
+        return None
+    if quota <= 0 or period <= 0:
+        return None
+    return max(math.ceil(quota / period), 1)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    # запись во временный файл рядом с целевым и переименование: читатель видит либо старый файл, либо новый целиком.
+    # своё имя у каждого писателя, чтобы параллельные сохранения одного файла не портили друг другу временный файл
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        tmp_path.replace(path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: Path, text: str, encoding: str = "utf-8") -> None:
+    atomic_write_bytes(path, text.encode(encoding))